@@ -0,0 +1,5 @@
+"""Performance checks for Movie Bucket, run against a scratch database.
+
+Each module is a script, e.g. ``python -m benchmarks.endpoints``, and
+exits non-zero when a budget is exceeded.
+"""
@@ -0,0 +1,86 @@
+"""Compares request decoding and response encoding before and after schemas.
+
+The old path parses bodies with Flask's JSON provider and reads fields off
+the dict, and builds responses with jsonify. The new path decodes straight
+into msgspec structs and encodes with schemas.respond. Needs no database.
+
+    python -m benchmarks.codecs
+"""
+
+import sys
+import json
+import timeit
+
+import msgspec
+
+from flask import Flask, jsonify
+
+from benchmarks.micro import BUCKET_MOVIES, REPEAT, make_movie
+from movie_bucket import schemas
+
+NEW_MOVIE = {
+    "bucket_id": 1,
+    "id": 603,
+    "title": "The Matrix",
+    "image": "/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
+    "release_date": "1999-03-30",
+    "runtime": 136,
+    "genre": "Action, Science Fiction",
+    "bio": "Set in the 22nd century, The Matrix tells the story of a hacker. " * 4,
+}
+
+NEW_MOVIE_FIELDS = list(NEW_MOVIE)
+
+
+def best(function):
+    """Best time per call in microseconds over REPEAT runs"""
+
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+
+    return min(timer.repeat(repeat=REPEAT, number=number)) / number * 1e6
+
+
+def main():
+    app = Flask(__name__)
+
+    raw_body = json.dumps(NEW_MOVIE).encode()
+    decoder = msgspec.json.Decoder(schemas.NewMovieBody)
+
+    movies = [
+        make_movie(movie_id).serialize() for movie_id in range(1, BUCKET_MOVIES + 1)
+    ]
+
+    def decode_dict():
+        data = app.json.loads(raw_body)
+        return [data.get(field) for field in NEW_MOVIE_FIELDS]
+
+    def decode_struct():
+        body = decoder.decode(raw_body)
+        return [getattr(body, field) for field in NEW_MOVIE_FIELDS]
+
+    def encode_jsonify():
+        return jsonify(movies).get_data()
+
+    def encode_msgspec():
+        return schemas.respond(movies).get_data()
+
+    comparisons = [
+        ("decode add-movie body", decode_dict, decode_struct),
+        (f"encode {BUCKET_MOVIES} movies", encode_jsonify, encode_msgspec),
+    ]
+
+    with app.app_context():
+        for name, old, new in comparisons:
+            old_us, new_us = best(old), best(new)
+
+            print(
+                f"{name:<25} before {old_us:>9.2f}us  after {new_us:>9.2f}us  "
+                f"{old_us / new_us:.1f}x"
+            )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
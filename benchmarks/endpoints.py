@@ -0,0 +1,154 @@
+"""Latency and query-count budgets for every route in app.py.
+
+Seeds BENCHMARK_DATABASE_URL, drives every route but those listed in
+harness.EXCLUDED_ROUTES through the Flask test client and records p50/p95
+latency and the number of SQL statements each issues. Every request must
+succeed, or nothing is recorded. Results are compared against
+benchmarks/baselines.json: a route fails when it issues more statements
+than its baseline, or its p95 grows past LATENCY_TOLERANCE times the
+baseline.
+
+Statement counts don't depend on the machine, so the committed baselines
+are query budgets for every route, counted with cold caches. Latency
+baselines only mean something on the machine that recorded them, record
+them there with --update-baseline before relying on the p95 check.
+
+GET routes are called ROUNDS times; writes change the data, so they run
+once each after the reads.
+
+    BENCHMARK_DATABASE_URL=postgresql:///movie_bucket_bench \\
+        python -m benchmarks.endpoints [--update-baseline]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from benchmarks import harness
+from seed import seed_dataset
+
+ROUNDS = 50
+
+# p95 may grow this much before failing, plus an absolute allowance so
+# sub-millisecond routes don't fail on noise
+LATENCY_TOLERANCE = 1.5
+LATENCY_SLACK_MS = 2
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+
+
+def percentile(samples, fraction):
+    """Nearest-rank percentile of sorted samples"""
+
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def measure(client, route, headers, rounds):
+    """p50 and p95 in milliseconds and the most statements any call issued"""
+
+    latencies = []
+    queries = 0
+
+    for _ in range(rounds):
+        with harness.capture_statements() as statements:
+            started = time.perf_counter()
+            harness.call(client, route, headers)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+        queries = max(queries, len(statements))
+
+    latencies.sort()
+
+    return {
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "queries": queries,
+    }
+
+
+def check(name, result, baseline):
+    """Failure messages for a route measured against its baseline"""
+
+    failures = []
+
+    if result["queries"] > baseline["queries"]:
+        failures.append(
+            f"{name}: {result['queries']} statements, "
+            f"baseline {baseline['queries']}"
+        )
+
+    if "p95_ms" not in baseline:
+        return failures
+
+    limit = baseline["p95_ms"] * LATENCY_TOLERANCE + LATENCY_SLACK_MS
+    if result["p95_ms"] > limit:
+        failures.append(f"{name}: p95 {result['p95_ms']}ms, limit {limit:.2f}ms")
+
+    return failures
+
+
+def load_baselines():
+    try:
+        with open(BASELINES_PATH) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write this run's results to baselines.json instead of checking",
+    )
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    args = parser.parse_args()
+
+    app = harness.load_app()
+
+    with app.app_context():
+        ids = seed_dataset()
+
+    headers = harness.auth_headers(app, ids["user_id"])
+    client = app.test_client()
+
+    baselines = load_baselines()
+    results = {}
+    failures = []
+
+    for route in harness.build_routes(ids):
+        rounds = args.rounds if route.method == "GET" else 1
+
+        # budgets are counted with cold caches, earlier routes warm them
+        harness.clear_response_cache(app)
+        result = results[route.name] = measure(client, route, headers, rounds)
+
+        print(
+            f"{route.name:<20} p50 {result['p50_ms']:>8.2f}ms  "
+            f"p95 {result['p95_ms']:>8.2f}ms  {result['queries']:>3} queries"
+        )
+
+        if route.name not in baselines:
+            print(f"{route.name:<20} no baseline, run with --update-baseline")
+        elif not args.update_baseline:
+            failures.extend(check(route.name, result, baselines[route.name]))
+
+    if args.update_baseline:
+        with open(BASELINES_PATH, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+            file.write("\n")
+
+        print(f"wrote {BASELINES_PATH}")
+        return 0
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
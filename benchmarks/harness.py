@@ -0,0 +1,330 @@
+"""Shared setup for benchmarks: app loading, routes and SQL capture."""
+
+import io
+import os
+
+from collections import namedtuple
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+Route = namedtuple(
+    "Route",
+    ["name", "method", "path", "params", "body", "headers", "upload"],
+    defaults=(None, None),
+)
+
+# routes build_routes leaves out, and why
+EXCLUDED_ROUTES = {
+    "/users/buckets/events": "streams until the client disconnects",
+}
+
+WATCHLIST_CSV = b"title,release_date,watched\nMovie 1,,true\nUnknown Movie,1999,\n"
+
+
+def load_app():
+    """Create the app pointed at BENCHMARK_DATABASE_URL, calling a local
+    TMDB stub instead of TMDB.
+
+    Benchmarks drop and recreate every table, so they refuse to run
+    without a dedicated database.
+    """
+
+    url = os.environ.get("BENCHMARK_DATABASE_URL")
+    if not url:
+        raise SystemExit("set BENCHMARK_DATABASE_URL to a scratch database")
+
+    os.environ["DATABASE_URL"] = url
+    for name in (
+        "API_KEY",
+        "AUTH_KEY",
+        "ADMIN_TOKEN",
+        "JWT_SECRET_KEY",
+        "FLASK_SECRET_KEY",
+    ):
+        os.environ.setdefault(name, "benchmark")
+
+    from benchmarks import tmdb_stub
+    from movie_bucket.app import create_app
+
+    # synthetic results, their ids are the most popular seeded movies
+    stub = tmdb_stub.serve()
+
+    return create_app(
+        {
+            # routes are sampled many times from one client, don't measure
+            # the limiter
+            "RATE_LIMIT_ENABLED": False,
+            # identities are int user ids, PyJWT 2.10+ only accepts str subjects
+            "JWT_VERIFY_SUB": False,
+            "TMDB_TRANSPORT": "live",
+            "TMDB_BASE_URL": stub.base_url,
+        }
+    )
+
+
+def auth_headers(app, user_id):
+    """Bearer token headers for a user"""
+
+    from flask_jwt_extended import create_access_token
+
+    with app.app_context():
+        token = create_access_token(identity=user_id)
+
+    return {"Authorization": f"Bearer {token}"}
+
+
+def build_routes(ids):
+    """Every route in app.py but EXCLUDED_ROUTES, with arguments pointing at
+    seeded rows.
+
+    Read-only routes come first; writes run last on rows reserved for them,
+    and logout runs last of all.
+    """
+
+    bucket_id = ids["bucket_id"]
+
+    return [
+        Route("list buckets", "GET", "/users/buckets", {}, None),
+        Route("stream buckets", "GET", "/users/buckets", {"stream": "true"}, None),
+        Route("bucket info", "GET", "/users/buckets", {"bucket_id": bucket_id}, None),
+        Route(
+            "list movies",
+            "GET",
+            "/users/buckets/movies",
+            {"bucket_id": bucket_id},
+            None,
+        ),
+        Route(
+            "stream movies",
+            "GET",
+            "/users/buckets/movies",
+            {"bucket_id": bucket_id, "stream": "true"},
+            None,
+        ),
+        Route(
+            "filter movies",
+            "GET",
+            "/users/buckets/movies",
+            {
+                "bucket_id": bucket_id,
+                "watched": "false",
+                "year_from": 1990,
+                "max_runtime": 120,
+                "sort": "-release_date",
+            },
+            None,
+        ),
+        Route(
+            "random pick",
+            "GET",
+            "/users/buckets/movies/random",
+            {"bucket_id": bucket_id, "k": 3},
+            None,
+        ),
+        Route(
+            "suggestions",
+            "GET",
+            "/users/buckets/suggestions",
+            {"bucket_id": bucket_id},
+            None,
+        ),
+        Route(
+            "export", "GET", "/users/buckets/export", {"bucket_id": bucket_id}, None
+        ),
+        Route(
+            "changes",
+            "GET",
+            "/users/buckets/changes",
+            {"bucket_id": bucket_id, "since": 0},
+            None,
+        ),
+        Route(
+            "search",
+            "GET",
+            "/api/search/movies",
+            {"query": "movie", "annotate": "buckets"},
+            None,
+        ),
+        Route("trending", "GET", "/movies/trending", {}, None),
+        Route("task progress", "GET", "/users/tasks", {"task_id": "benchmark"}, None),
+        Route(
+            "cache stats",
+            "GET",
+            "/admin/cache/stats",
+            {},
+            None,
+            headers={"X-Admin-Token": os.environ["ADMIN_TOKEN"]},
+        ),
+        Route(
+            "batch",
+            "POST",
+            "/batch",
+            {},
+            {
+                "requests": [
+                    {"path": "/users/buckets"},
+                    {"path": "/users/buckets", "params": {"bucket_id": bucket_id}},
+                    {
+                        "path": "/users/buckets/movies",
+                        "params": {"bucket_id": bucket_id},
+                    },
+                ]
+            },
+        ),
+        Route(
+            "signup",
+            "POST",
+            "/signup",
+            {},
+            {
+                "username": "benchmark",
+                "email": "benchmark@example.com",
+                "password": "password",
+            },
+        ),
+        Route("login", "POST", "/login", {}, ids["credentials"]),
+        Route(
+            "invite", "GET", "/users/buckets/invite", {"bucket_id": bucket_id}, None
+        ),
+        Route(
+            "link",
+            "POST",
+            "/users/buckets/link",
+            {},
+            ids["invite"],
+        ),
+        Route(
+            "add bucket",
+            "POST",
+            "/users/buckets",
+            {},
+            {"bucket_name": "benchmark", "genre": "Drama"},
+        ),
+        Route(
+            "add public bucket",
+            "POST",
+            "/public/buckets",
+            {},
+            {"bucket_name": "benchmark"},
+        ),
+        Route(
+            "update bucket",
+            "PATCH",
+            "/users/buckets",
+            {"bucket_id": bucket_id},
+            {"description": "benchmarked"},
+        ),
+        Route(
+            "add movie",
+            "POST",
+            "/users/buckets/movies",
+            {},
+            {
+                "bucket_id": bucket_id,
+                "id": ids["new_movie_id"],
+                "title": "Benchmark",
+                "runtime": 100,
+                "genre": "Drama",
+            },
+        ),
+        Route(
+            "toggle movie",
+            "PATCH",
+            "/users/buckets/movies",
+            {},
+            {"bucket_id": bucket_id, "movie_id": ids["movie_id"]},
+        ),
+        Route(
+            "delete movie",
+            "DELETE",
+            "/users/buckets/movies",
+            {},
+            {"bucket_id": bucket_id, "movie_id": ids["doomed_movie_id"]},
+        ),
+        Route(
+            "delete bucket",
+            "DELETE",
+            "/users/buckets",
+            {},
+            {"bucket_id": ids["doomed_bucket_id"]},
+        ),
+        Route(
+            "import",
+            "POST",
+            "/users/buckets/import",
+            {"bucket_id": bucket_id},
+            None,
+            upload=("watchlist.csv", WATCHLIST_CSV),
+        ),
+        Route("logout", "POST", "/logout", {}, None),
+    ]
+
+
+def call(client, route, headers):
+    """Issue a route through the test client and drain the response.
+
+    Exits unless the route succeeded, so nothing is ever measured on a
+    request that failed. Handled errors are a 200 with success false.
+    """
+
+    if route.upload is None:
+        payload = {"json": route.body}
+    else:
+        filename, content = route.upload
+        payload = {"data": {"file": (io.BytesIO(content), filename)}}
+
+    response = client.open(
+        route.path,
+        method=route.method,
+        query_string=route.params,
+        headers={**headers, **(route.headers or {})},
+        **payload,
+    )
+    body = response.get_data()
+
+    failed = not 200 <= response.status_code < 300
+    if not failed and response.is_json:
+        result = response.get_json()
+        failed = isinstance(result, dict) and result.get("success") is False
+
+    if failed:
+        raise SystemExit(
+            f"{route.name} failed with {response.status_code}: {body[:500]!r}"
+        )
+
+    return response
+
+
+def clear_response_cache(app):
+    """Drop every cached response, so the next call of a route runs cold"""
+
+    from redis.exceptions import RedisError
+    from movie_bucket.redis_client import get_redis
+
+    with app.app_context():
+        try:
+            redis = get_redis()
+            keys = list(redis.scan_iter("cache:*"))
+
+            if keys:
+                redis.delete(*keys)
+        except RedisError:
+            pass
+
+
+@contextmanager
+def capture_statements():
+    """Collect (statement, parameters, executemany) for every query run"""
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        statements.append((statement, parameters, many))
+
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
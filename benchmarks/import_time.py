@@ -0,0 +1,147 @@
+"""Checks how long each process entry point takes to import.
+
+Runs every entry point in a fresh interpreter under ``-X importtime`` and
+fails when its cumulative import time exceeds the budget, when it pulls in
+a module its process never uses, or when it misses one the process can't
+work without. Budgets are multiples of the time REFERENCE takes to import
+in the same run, so they hold on faster and slower machines alike. Needs
+no database; tests/test_import_time.py runs it with the test suite.
+
+    python -m benchmarks.import_time
+"""
+
+import os
+import sys
+import statistics
+import subprocess
+
+from collections import namedtuple
+
+EntryPoint = namedtuple(
+    "EntryPoint", ["name", "statement", "budget", "forbidden", "required"]
+)
+
+# third-party packages both processes need, so what a budget limits is
+# everything else an entry point imports
+REFERENCE = "import flask_sqlalchemy, celery"
+
+# a single import can take twice as long as the next, the median of RUNS
+# fresh interpreters can't
+RUNS = 5
+
+ENTRY_POINTS = [
+    EntryPoint(
+        "celery worker",
+        # the worker app is built on the first task, build it here too
+        "import movie_bucket.celery_config; "
+        "from movie_bucket.celery_app import get_worker_app; get_worker_app()",
+        2.0,
+        ("movie_bucket.app", "flask_migrate", "flask_cors", "numpy", "scipy"),
+        # tasks write change log rows, their listeners publish them
+        ("movie_bucket.change_feed",),
+    ),
+    EntryPoint(
+        "web app",
+        "from movie_bucket.app import create_app",
+        2.5,
+        ("movie_bucket.tasks", "numpy", "scipy"),
+        ("movie_bucket.change_feed",),
+    ),
+]
+
+# the factory must not read these at import time, dummies prove it
+DUMMY_ENV = {
+    "DATABASE_URL": "postgresql+psycopg2:///import_time",
+    "AUTH_KEY": "import_time",
+    "API_KEY": "import_time",
+    "ADMIN_TOKEN": "import_time",
+}
+
+
+def import_times(statement):
+    """(module, cumulative microseconds) per import, nested ones indented"""
+
+    env = {**DUMMY_ENV, **os.environ}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+    times = []
+
+    # lines look like "import time:   self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        _, cumulative, module = line[len("import time:") :].split("|")
+        times.append((module.rstrip()[1:], int(cumulative)))
+
+    return times
+
+
+def total_ms(times):
+    """Import time of a statement, the sum of its top-level imports"""
+
+    return sum(
+        cumulative for module, cumulative in times if module == module.lstrip()
+    ) / 1000
+
+
+def median_ms(statement):
+    """Median import time of a statement over RUNS fresh interpreters, and
+    the modules it imported"""
+
+    runs = [import_times(statement) for _ in range(RUNS)]
+    imported = {module.strip() for module, _ in runs[0]}
+
+    return statistics.median(total_ms(times) for times in runs), imported
+
+
+def check():
+    """Failures of every entry point, printing each one's import time"""
+
+    failures = []
+    reference_ms, _ = median_ms(REFERENCE)
+
+    print(f"reference: {reference_ms:.0f}ms")
+
+    for entry in ENTRY_POINTS:
+        elapsed_ms, imported = median_ms(entry.statement)
+        ratio = elapsed_ms / reference_ms
+
+        print(
+            f"{entry.name}: {elapsed_ms:.0f}ms, {ratio:.2f}x reference "
+            f"(budget {entry.budget}x)"
+        )
+
+        if ratio > entry.budget:
+            failures.append(
+                f"{entry.name} took {ratio:.2f}x the reference to import"
+            )
+
+        for module in entry.forbidden:
+            if module in imported:
+                failures.append(f"{entry.name} imports {module}")
+
+        for module in entry.required:
+            if module not in imported:
+                failures.append(f"{entry.name} doesn't import {module}")
+
+    return failures
+
+
+def main():
+    failures = check()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
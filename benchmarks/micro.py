@@ -0,0 +1,177 @@
+"""Microbenchmarks for serializers, helpers and the rate limiter, which run
+on every request.
+
+Times each case on synthetic, unsaved model objects of realistic sizes and
+compares the median of RUNS per-call times against
+benchmarks/micro_baselines.json; a case fails when it is more than
+TOLERANCE times slower. Times are stored relative to a fixed pure-Python
+calibration workload timed next to each run, so the committed baselines
+hold on faster and slower machines alike. Needs no database.
+
+    python -m benchmarks.micro [--update-baseline]
+"""
+
+import os
+import sys
+import json
+import timeit
+import statistics
+import argparse
+import itertools
+
+from datetime import date
+
+import helpers
+
+from models import Movie, User, Bucket
+from movie_bucket.rate_limit import TokenBucket
+
+REPEAT = 7
+RUNS = 5
+
+# on an unchanged tree the median of RUNS varied by up to 1.3x between
+# invocations, the best of RUNS by up to 1.8x
+TOLERANCE = 1.5
+
+# baselines are the median of more runs, to pin down the centre
+BASELINE_RUNS = 15
+
+# a large bucket, and a bucket shared by a handful of users
+BUCKET_MOVIES = 200
+BUCKET_USERS = 5
+
+BASELINES_PATH = os.path.join(os.path.dirname(__file__), "micro_baselines.json")
+
+
+def make_movie(movie_id):
+    return Movie(
+        id=movie_id,
+        title=f"Movie {movie_id}",
+        image=f"/poster{movie_id}.jpg",
+        release_date=date(2001, 1, 1),
+        runtime=90 + movie_id % 60,
+        genre="Drama",
+        bio="A movie. " * 40,
+        is_watched=movie_id % 3 == 0,
+    )
+
+
+def make_cases():
+    """name -> zero-argument callable to time"""
+
+    movies = [make_movie(movie_id) for movie_id in range(1, BUCKET_MOVIES + 1)]
+    users = [
+        User(id=user_id, username=f"user{user_id}", email=f"user{user_id}@example.com")
+        for user_id in range(1, BUCKET_USERS + 1)
+    ]
+
+    bucket = Bucket(
+        id=1, bucket_name="Weekend", genre="Drama", description="Films to see."
+    )
+    bucket.users = users
+
+    last_user_id = users[-1].id
+    stranger_id = BUCKET_USERS + 1
+
+    # never runs dry, so every call takes the same path
+    limiter = TokenBucket()
+    clients = itertools.cycle([f"ratelimit:search:{i}" for i in range(1000)])
+
+    return {
+        "Movie.serialize": movies[0].serialize,
+        "Movie.serialize bucket": lambda: [movie.serialize() for movie in movies],
+        "User.serialize": users[0].serialize,
+        "Bucket.serialize": bucket.serialize,
+        "create_response": lambda: helpers.create_response(
+            message="Bucket created", success=True, status="Created"
+        ),
+        "generate_invite_code": lambda: helpers.generate_invite_code(6),
+        "is_user_authorized member": lambda: helpers.is_user_authorized(
+            bucket, last_user_id
+        ),
+        "is_user_authorized stranger": lambda: helpers.is_user_authorized(
+            bucket, stranger_id
+        ),
+        "TokenBucket.acquire": lambda: limiter.acquire(next(clients), 1e9, 1e9),
+    }
+
+
+def calibration():
+    """Fixed workload of calls, allocations and comparisons, the unit case
+    times are expressed in"""
+
+    return sorted(str(number) for number in range(200))
+
+
+def time_case(function):
+    """Best time per call in microseconds over REPEAT runs"""
+
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+
+    return min(timer.repeat(repeat=REPEAT, number=number)) / number * 1e6
+
+
+def load_baselines():
+    try:
+        with open(BASELINES_PATH) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write this run's results to micro_baselines.json",
+    )
+    args = parser.parse_args()
+
+    baselines = load_baselines()
+    results = {}
+    failures = []
+
+    runs = BASELINE_RUNS if args.update_baseline else RUNS
+
+    for name, function in make_cases().items():
+        # calibrated next to each case, so load on the machine affects both
+        ratios = []
+
+        for _ in range(runs):
+            unit = time_case(calibration)
+            elapsed = time_case(function)
+            ratios.append(elapsed / unit)
+
+        results[name] = round(statistics.median(ratios), 4)
+        baseline = baselines.get(name)
+
+        if baseline is None:
+            print(f"{name:<30} {elapsed:>10.3f}us  {results[name]:.4f}x  (no baseline)")
+            continue
+
+        print(
+            f"{name:<30} {elapsed:>10.3f}us  {results[name]:.4f}x  "
+            f"baseline {baseline:.4f}x"
+        )
+
+        if results[name] > baseline * TOLERANCE:
+            failures.append(f"{name}: {results[name]:.4f}x, baseline {baseline}x")
+
+    if args.update_baseline:
+        with open(BASELINES_PATH, "w") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+            file.write("\n")
+
+        print(f"wrote {BASELINES_PATH}")
+        return 0
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
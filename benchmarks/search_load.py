@@ -0,0 +1,127 @@
+"""Load test of /api/search/movies under sync and gevent workers.
+
+Starts the TMDB stub with a fixed latency, then serves the app with
+gunicorn once per worker class and fires the same burst of concurrent
+searches at each. Search only waits on TMDB, so gevent workers should
+multiply throughput; the run fails below MIN_SPEEDUP. Needs no database.
+
+    python -m benchmarks.search_load
+"""
+
+import os
+import sys
+import time
+import socket
+import subprocess
+import requests
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import tmdb_stub
+
+TMDB_LATENCY_MS = 200
+WORKERS = 2
+CONCURRENCY = 50
+REQUESTS = 500
+MIN_SPEEDUP = 4
+
+Mode = namedtuple("Mode", ["name", "app", "worker_class"])
+
+MODES = [
+    Mode("sync", "wsgi:app", "sync"),
+    Mode("gevent", "gevent_wsgi:app", "gevent"),
+]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, tmdb_url):
+    """Run gunicorn for a mode and wait until it accepts requests"""
+
+    env = {
+        **os.environ,
+        "GUNICORN_APP": mode.app,
+        "GUNICORN_WORKER_CLASS": mode.worker_class,
+        "GUNICORN_WORKERS": str(WORKERS),
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "TMDB_BASE_URL": tmdb_url,
+        # every search comes from one address, limiting would cut the run short
+        "RATE_LIMIT_ENABLED": "false",
+    }
+    # search never touches the database, the URL only has to parse
+    env.setdefault("DATABASE_URL", "postgresql:///search_load")
+    for name in ("API_KEY", "AUTH_KEY", "ADMIN_TOKEN"):
+        env.setdefault(name, "benchmark")
+
+    process = subprocess.Popen(["gunicorn", "-c", "gunicorn.conf.py"], env=env)
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+
+    process.terminate()
+    raise SystemExit(f"{mode.name} server did not start")
+
+
+def run_load(url):
+    """Fire REQUESTS searches CONCURRENCY at a time, return latencies and
+    wall time in seconds"""
+
+    session = requests.Session()
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=CONCURRENCY))
+
+    def search(index):
+        started = time.perf_counter()
+        response = session.get(url, params={"query": f"movie {index % 10}"})
+        response.raise_for_status()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(CONCURRENCY) as pool:
+        latencies = sorted(pool.map(search, range(REQUESTS)))
+
+    return latencies, time.perf_counter() - started
+
+
+def main():
+    stub = tmdb_stub.serve(latency_ms=TMDB_LATENCY_MS)
+    throughput = {}
+
+    for mode in MODES:
+        port = free_port()
+        process = start_server(mode, port, stub.base_url)
+
+        try:
+            latencies, elapsed = run_load(f"http://127.0.0.1:{port}/api/search/movies")
+        finally:
+            process.terminate()
+            process.wait()
+
+        throughput[mode.name] = REQUESTS / elapsed
+        p50 = latencies[len(latencies) // 2] * 1000
+        p95 = latencies[int(len(latencies) * 0.95)] * 1000
+
+        print(
+            f"{mode.name}: {throughput[mode.name]:.0f} req/s, "
+            f"p50 {p50:.0f}ms, p95 {p95:.0f}ms"
+        )
+
+    stub.shutdown()
+
+    speedup = throughput["gevent"] / throughput["sync"]
+    print(f"gevent speedup: {speedup:.1f}x (minimum {MIN_SPEEDUP}x)")
+
+    return 0 if speedup >= MIN_SPEEDUP else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,188 @@
+"""Local stand-in for the TMDB API, with latency and error injection.
+
+Serves the endpoints movie_bucket.tmdb calls. With --cassettes it answers
+from responses recorded with TMDB_TRANSPORT=record, otherwise with
+synthetic results. Point the app at it with TMDB_BASE_URL:
+
+    python -m benchmarks.tmdb_stub --port 8765 --latency 200 --jitter 50 \\
+        --error-rate 0.05 --cassettes benchmarks/cassettes
+    TMDB_BASE_URL=http://127.0.0.1:8765/ gunicorn -c gunicorn.conf.py
+
+Latency, jitter and injected errors come from a seeded generator, so a
+run can be repeated exactly.
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from movie_bucket.tmdb import load_cassette
+
+SEARCH_RESULTS = 20
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers search/movie and movie/<id> after the server's latency"""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        path = url.path.strip("/")
+        parts = path.split("/")
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        delay, fail = self.server.next_outcome()
+        time.sleep(delay)
+
+        if fail:
+            self.send_json(
+                self.server.error_status, {"status_message": "injected error"}
+            )
+        elif self.server.cassette_dir is not None:
+            cassette = load_cassette(self.server.cassette_dir, path, params or None)
+
+            if cassette is None:
+                self.send_json(404, {"status_message": "no cassette"})
+            else:
+                self.send_json(cassette["status"], cassette["body"])
+        elif parts[-2:] == ["search", "movie"]:
+            self.send_json(200, search_payload(params.get("query", "")))
+        elif len(parts) >= 2 and parts[-2] == "movie" and parts[-1].isdigit():
+            self.send_json(200, details_payload(int(parts[-1])))
+        else:
+            self.send_json(404, {"status_message": "not found"})
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def search_payload(query):
+    """Deterministic search results for a query"""
+
+    return {
+        "page": 1,
+        "results": [
+            {
+                "id": index + 1,
+                "title": f"{query} {index + 1}",
+                "poster_path": f"/poster{index + 1}.jpg",
+                "release_date": "2001-01-01",
+                "overview": f"A movie about {query}.",
+            }
+            for index in range(SEARCH_RESULTS)
+        ],
+    }
+
+
+def details_payload(movie_id):
+    """Deterministic details for a movie"""
+
+    return {
+        "id": movie_id,
+        "poster_path": f"/poster{movie_id}.jpg",
+        "release_date": "2001-01-01",
+        "runtime": 90 + movie_id % 60,
+        "genres": [{"id": 18, "name": "Drama"}],
+        "overview": f"Movie {movie_id}.",
+    }
+
+
+class StubServer(ThreadingHTTPServer):
+    """Holds the stub's settings and its seeded source of latency and errors"""
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port,
+        latency_ms=0,
+        jitter_ms=0,
+        error_rate=0.0,
+        error_status=500,
+        cassette_dir=None,
+        seed=0,
+    ):
+        super().__init__(("127.0.0.1", port), StubHandler)
+
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.cassette_dir = cassette_dir
+        self.base_url = f"http://127.0.0.1:{self.server_address[1]}/"
+
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def next_outcome(self):
+        """(delay in seconds, whether to fail) for the next request"""
+
+        with self.lock:
+            delay = self.latency + self.rng.uniform(-self.jitter, self.jitter)
+            fail = self.rng.random() < self.error_rate
+
+        return max(delay, 0), fail
+
+
+def serve(port=0, latency_ms=0, **options):
+    """Start the stub on a background thread and return the server.
+
+    server.base_url is what TMDB_BASE_URL should be set to. options are
+    those of StubServer.
+    """
+
+    server = StubServer(port, latency_ms, **options)
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=int, default=0, help="milliseconds")
+    parser.add_argument("--jitter", type=int, default=0, help="milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--cassettes", help="serve responses recorded here")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = serve(
+        args.port,
+        args.latency,
+        jitter_ms=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        cassette_dir=args.cassettes,
+        seed=args.seed,
+    )
+    print(f"serving TMDB stub at {server.base_url}")
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""Cooperative WSGI entry point for production: gunicorn -c gunicorn.conf.py
+
+Patches the standard library and psycopg2 for gevent before anything else
+is imported, so a worker keeps serving other requests while one waits on
+TMDB, Postgres or Redis.
+"""
+
+from gevent import monkey
+
+monkey.patch_all()
+
+from psycogreen.gevent import patch_psycopg  # noqa: E402
+
+patch_psycopg()
+
+from movie_bucket.app import create_app  # noqa: E402
+
+app = create_app()
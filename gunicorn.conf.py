@@ -0,0 +1,30 @@
+"""Gunicorn settings. Serves gevent_wsgi:app with gevent workers by default;
+GUNICORN_APP=wsgi:app GUNICORN_WORKER_CLASS=sync gives the old sync setup.
+
+Each gevent worker runs up to GUNICORN_WORKER_CONNECTIONS requests at once
+but they share DB_POOL_SIZE + DB_MAX_OVERFLOW connections, so routes that
+hit Postgres queue for a connection rather than opening one each.
+"""
+
+import os
+import multiprocessing
+
+wsgi_app = os.environ.get("GUNICORN_APP", "gevent_wsgi:app")
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() + 1))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", 200))
+
+# import the app once in the master, workers fork with it loaded
+preload_app = True
+
+
+def post_fork(server, worker):
+    """Connections opened in the master must not be shared by workers"""
+
+    from models import db
+
+    with server.app.wsgi().app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
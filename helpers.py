@@ -1,16 +1,65 @@
+import io
+import re
+import csv
+import json
 import string
 import random
 import time
 import functools
 
-from models import db, Bucket, User_Buckets, Movie, Buckets_Movies, User, BucketLink
+from models import (
+    db,
+    Bucket,
+    User_Buckets,
+    Movie,
+    Buckets_Movies,
+    User,
+    BucketLink,
+    BucketChange,
+    MovieNeighbour,
+)
+from sqlalchemy import func, or_
 from sqlalchemy.exc import IntegrityError
-from typing import Dict, List
-from datetime import datetime, timedelta
+from movie_bucket import cache
+from movie_bucket.schemas import BucketPatchBody, LinkBody, NewBucketBody, NewMovieBody
+from msgspec import UNSET
+from typing import Dict, List, Optional
+from datetime import MAXYEAR, MINYEAR, date, datetime, timedelta
+from urllib.parse import urlencode
 
 BUCKET_FIELDS = ["bucket_name", "genre", "description"]
 USER_FIELDS = ["username", "email", "password"]
 
+CHANGE_FEED_PAGE_SIZE = 100
+CHANGE_FEED_MAX_PAGE_SIZE = 500
+CHANGE_COMPACTION_BATCH_SIZE = 1000
+PURGE_BATCH_SIZE = 1000
+PURGE_GRACE_MINUTES = 10
+EXPORT_BATCH_SIZE = 500
+
+MOVIE_SORT_FIELDS = {
+    "id": Movie.id,
+    "title": Movie.title,
+    "release_date": Movie.release_date,
+    "runtime": Movie.runtime,
+}
+MOVIE_FILTER_FIELDS = ["genre", "watched", "year_from", "year_to", "max_runtime"]
+RANDOM_PICK_MAX = 10
+SUGGESTIONS_PAGE_SIZE = 10
+SUGGESTIONS_MAX_PAGE_SIZE = 50
+
+RUNTIME_PATTERN = re.compile(r"\s*(?:(\d+)\s*h[a-z]*)?\s*(\d+)?", re.IGNORECASE)
+EXPORT_FIELDS = [
+    "id",
+    "title",
+    "image",
+    "release_date",
+    "runtime",
+    "genre",
+    "bio",
+    "is_watched",
+]
+
 
 ########################################################
 ###-------------------------------------------DB HELPERS
@@ -37,12 +86,19 @@ def create_bucket(bucket_name: str, genre: str, description: str) -> Bucket:
         raise err(error_message)
 
 
-def update_bucket(bucket: Bucket, data: Dict):
+def update_bucket(bucket: Bucket, data: BucketPatchBody):
     """Update bucket resource and commit to db"""
 
     for field in BUCKET_FIELDS:
-        if field in data:
-            setattr(bucket, field, data[field])
+        value = getattr(data, field)
+        if value is not UNSET:
+            setattr(bucket, field, value)
+
+    record_change(bucket.id, "bucket", bucket.id, "upsert", bucket.serialize())
+    cache.invalidate_on_commit(
+        cache.bucket_key(bucket.id, "info"),
+        *(cache.user_key(user.id, "buckets") for user in bucket.users),
+    )
 
     try:
         db.session.commit()
@@ -61,8 +117,8 @@ def create_movie(
     id: str,
     title: str,
     image: str,
-    release_date: str,
-    runtime: str,
+    release_date: date,
+    runtime: int,
     genre: str,
     bio: str,
 ) -> Movie:
@@ -95,6 +151,10 @@ def create_movie(
 def delete_movie(movie: Movie) -> Dict:
     """Delete a movie and build a response"""
 
+    for bucket in movie.buckets:
+        record_change(bucket.id, "movie", movie.id, "delete")
+        cache.invalidate_on_commit(cache.bucket_key(bucket.id, "movies"))
+
     try:
         db.session.delete(movie)
         db.session.commit()
@@ -117,6 +177,9 @@ def associate_user_with_bucket(user_id: int, bucket_id: int) -> bool:
     try:
         user_bucket = User_Buckets(user_id=user_id, bucket_id=bucket_id)
         db.session.add(user_bucket)
+        cache.invalidate_on_commit(
+            cache.bucket_key(bucket_id, "info"), cache.user_key(user_id, "buckets")
+        )
         db.session.commit()
     except IntegrityError as err:
         db.session.rollback()
@@ -150,6 +213,11 @@ def toggle_movie_watch_status(movie: Movie):
     try:
         movie.is_watched = not movie.is_watched
         db.session.add(movie)
+
+        for bucket in movie.buckets:
+            record_change(bucket.id, "movie", movie.id, "upsert", movie.serialize())
+            cache.invalidate_on_commit(cache.bucket_key(bucket.id, "movies"))
+
         db.session.commit()
 
     except IntegrityError as err:
@@ -204,17 +272,31 @@ def create_bucket_link(bucket_id: int) -> Dict:
     return response
 
 
-def verify_and_link_users(data: Dict[str, any]):
+def verify_and_link_users(data: LinkBody):
     """Verify code matches, associate new user with bucket, clean up link"""
 
-    user_id: int = data.get("user_id")
-    bucket_id: int = data.get("bucket_id")
-    invite_code: str = data.get("invite_code")
+    user_id: int = data.user_id
+    bucket_id: int = data.bucket_id
+    invite_code: str = data.invite_code
 
     link = BucketLink.query.filter_by(bucket_id=bucket_id).first()
 
+    # links of a deleted bucket live until it is purged
+    if get_bucket(bucket_id) is None:
+        return False
+
     if link and link.expiration_date > datetime.now():
         if invite_code == link.invite_code:
+            user = get_user(user_id=user_id)
+
+            if user is None:
+                return create_response(
+                    message="user not found", success=False, status="Not Found"
+                )
+
+            # committed along with the association below
+            record_change(bucket_id, "user", user_id, "upsert", user.serialize())
+
             associate_user_with_bucket(user_id=user_id, bucket_id=bucket_id)
 
             try:
@@ -243,10 +325,19 @@ def verify_and_link_users(data: Dict[str, any]):
 
 
 def delete_bucket(bucket: Bucket) -> Dict:
-    """Delete a bucket and build a response"""
+    """Soft delete a bucket and build a response. The bucket is hidden at
+    once; purge_bucket removes its rows later"""
+
+    bucket.deleted_at = datetime.now()
+
+    record_change(bucket.id, "bucket", bucket.id, "delete")
+    cache.invalidate_on_commit(
+        cache.bucket_key(bucket.id, "info"),
+        cache.bucket_key(bucket.id, "movies"),
+        *(cache.user_key(user.id, "buckets") for user in bucket.users),
+    )
 
     try:
-        db.session.delete(bucket)
         db.session.commit()
 
     except IntegrityError as err:
@@ -261,6 +352,84 @@ def delete_bucket(bucket: Bucket) -> Dict:
     return response
 
 
+def purge_bucket(bucket_id: int, on_progress=None) -> Dict[str, int]:
+    """Delete a soft deleted bucket's rows in bounded chunks, one
+    transaction each, then the bucket itself. Returns rows deleted per
+    table; on_progress gets the running counts after every chunk"""
+
+    bucket = Bucket.query.get(bucket_id)
+
+    if bucket is None or bucket.deleted_at is None:
+        return {}
+
+    dependents = [
+        (Buckets_Movies, Buckets_Movies.bucket_id, Buckets_Movies.movie_id),
+        (User_Buckets, User_Buckets.bucket_id, User_Buckets.user_id),
+        (BucketLink, BucketLink.bucket_id, BucketLink.id),
+        (BucketChange, BucketChange.bucket_id, BucketChange.id),
+    ]
+    counts = {model.__tablename__: 0 for model, _, _ in dependents}
+
+    for model, bucket_column, key_column in dependents:
+        while True:
+            chunk = (
+                db.session.query(key_column)
+                .filter(bucket_column == bucket_id)
+                .limit(PURGE_BATCH_SIZE)
+                .scalar_subquery()
+            )
+
+            try:
+                deleted = model.query.filter(
+                    bucket_column == bucket_id, key_column.in_(chunk)
+                ).delete(synchronize_session=False)
+                db.session.commit()
+
+            except IntegrityError as err:
+                db.session.rollback()
+
+                error_message = err.orig.diag.message_detail
+
+                raise err(error_message)
+
+            if not deleted:
+                break
+
+            counts[model.__tablename__] += deleted
+
+            if on_progress is not None:
+                on_progress(counts)
+
+    try:
+        Bucket.query.filter(Bucket.id == bucket_id).delete(synchronize_session=False)
+        db.session.commit()
+
+    except IntegrityError as err:
+        db.session.rollback()
+
+        error_message = err.orig.diag.message_detail
+
+        raise err(error_message)
+
+    counts[Bucket.__tablename__] = 1
+
+    return counts
+
+
+def find_buckets_to_purge() -> List[int]:
+    """Ids of buckets deleted more than PURGE_GRACE_MINUTES ago, whose purge
+    task never ran or didn't finish"""
+
+    cutoff = datetime.now() - timedelta(minutes=PURGE_GRACE_MINUTES)
+
+    return [
+        bucket_id
+        for (bucket_id,) in db.session.query(Bucket.id)
+        .filter(Bucket.deleted_at < cutoff)
+        .order_by(Bucket.id)
+    ]
+
+
 def clean_up_links(links: List) -> bool:
     """Removes any links gives from db"""
 
@@ -279,17 +448,80 @@ def clean_up_links(links: List) -> bool:
     return True
 
 
+def record_change(
+    bucket_id: int, entity: str, entity_id: int, op: str, data: Dict = None
+) -> BucketChange:
+    """Append a change to the bucket change log.
+
+    Only adds to the session, so the change is committed atomically with
+    the mutation that produced it.
+    """
+
+    change = BucketChange(
+        bucket_id=bucket_id,
+        entity=entity,
+        entity_id=entity_id,
+        op=op,
+        data=data,
+    )
+
+    db.session.add(change)
+    return change
+
+
+def compact_changes() -> int:
+    """Remove change log entries superseded by a newer change to the same
+    entity. A client replaying from any cursor still ends up with the same
+    state, since every upsert carries the full entity."""
+
+    ranked = db.session.query(
+        BucketChange.id,
+        func.row_number()
+        .over(
+            partition_by=(
+                BucketChange.bucket_id,
+                BucketChange.entity,
+                BucketChange.entity_id,
+            ),
+            order_by=BucketChange.seq.desc(),
+        )
+        .label("rank"),
+    ).subquery()
+
+    superseded_ids = [
+        row.id for row in db.session.query(ranked.c.id).filter(ranked.c.rank > 1)
+    ]
+
+    for start in range(0, len(superseded_ids), CHANGE_COMPACTION_BATCH_SIZE):
+        batch = superseded_ids[start : start + CHANGE_COMPACTION_BATCH_SIZE]
+
+        try:
+            BucketChange.query.filter(BucketChange.id.in_(batch)).delete(
+                synchronize_session=False
+            )
+            db.session.commit()
+
+        except IntegrityError as err:
+            db.session.rollback()
+
+            error_message = err.orig.diag.message_detail
+
+            raise err(error_message)
+
+    return len(superseded_ids)
+
+
 ########################################################
 ###-----------------------------------MULTI-STEP HELPERS
 
 
-def add_bucket(user, data):
+def add_bucket(user, data: NewBucketBody):
     """Add/associate bucket to the user and create a response"""
 
     new_bucket = create_bucket(
-        bucket_name=data.get("bucket_name"),
-        genre=data.get("genre"),
-        description=data.get("description"),
+        bucket_name=data.bucket_name,
+        genre=data.genre,
+        description=data.description,
     )
 
     associate_user_with_bucket(user_id=user.id, bucket_id=new_bucket.id)
@@ -304,13 +536,13 @@ def add_bucket(user, data):
     return response
 
 
-def add_public_bucket(data):
+def add_public_bucket(data: NewBucketBody):
     """Add public bucket and create a response"""
 
     new_bucket = create_bucket(
-        bucket_name=data.get("bucket_name"),
-        genre=data.get("genre"),
-        description=data.get("description"),
+        bucket_name=data.bucket_name,
+        genre=data.genre,
+        description=data.description,
     )
 
     response = create_response(
@@ -321,19 +553,23 @@ def add_public_bucket(data):
     return response
 
 
-def add_movie_to_bucket(bucket: Bucket, data: Dict) -> Dict:
+def add_movie_to_bucket(bucket: Bucket, data: NewMovieBody) -> Dict:
     """Add/associate movie to the bucket and create a response"""
 
     new_movie = create_movie(
-        id=data.get("id"),
-        title=data.get("title"),
-        image=data.get("image"),
-        release_date=data.get("release_date"),
-        runtime=data.get("runtime"),
-        genre=data.get("genre"),
-        bio=data.get("bio"),
+        id=data.id,
+        title=data.title,
+        image=data.image,
+        release_date=parse_release_date(data.release_date),
+        runtime=parse_runtime(data.runtime),
+        genre=data.genre,
+        bio=data.bio,
     )
 
+    # committed along with the association below
+    record_change(bucket.id, "movie", new_movie.id, "upsert", new_movie.serialize())
+    cache.invalidate_on_commit(cache.bucket_key(bucket.id, "movies"))
+
     associate_movie_with_bucket(bucket_id=bucket.id, movie_id=new_movie.id)
 
     response = create_response(
@@ -359,9 +595,14 @@ def get_user(user_id: int):
 
 
 def get_bucket(bucket_id: int):
-    """Find bucket and return the instance"""
+    """Find bucket and return the instance, None if it was deleted"""
+
+    bucket = Bucket.query.get(bucket_id)
 
-    return Bucket.query.get(bucket_id)
+    if bucket is None or bucket.deleted_at is not None:
+        return None
+
+    return bucket
 
 
 def get_movie(movie_id: int):
@@ -374,20 +615,241 @@ def get_movie(movie_id: int):
 ###--------------------------------SERIALIZATION HELPERS
 
 
-def get_all_movies(bucket: Bucket) -> List[Dict]:
-    """Serializes all movies tied to a bucket"""
+def get_bucket_info(bucket_id: int) -> Dict:
+    """Serializes a bucket with its auth users, or None if it doesn't exist"""
+
+    bucket = get_bucket(bucket_id)
+
+    if bucket is None:
+        return None
+
+    return {"bucket": bucket.serialize(), "authorized_users": get_auth_users(bucket)}
+
+
+def get_changes_since(bucket: Bucket, cursor: int, limit: int) -> Dict:
+    """Serializes the bucket's changes after the cursor, a seq, oldest first.
+
+    seqs are handed out in commit order, so once a change is visible every
+    change with a lower seq is too and the cursor can't skip one.
+    """
+
+    changes = (
+        BucketChange.query.filter(
+            BucketChange.bucket_id == bucket.id,
+            BucketChange.seq > cursor,
+        )
+        .order_by(BucketChange.seq)
+        .limit(limit + 1)
+        .all()
+    )
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    if changes:
+        cursor = changes[-1].seq
+
+    return {
+        "changes": [change.serialize() for change in changes],
+        "cursor": cursor,
+        "has_more": has_more,
+    }
+
+
+def iter_bucket_movies(bucket_id: int):
+    """Yields a bucket's movies from a server-side cursor, one batch
+    in memory at a time"""
+
+    query = (
+        Movie.query.join(Buckets_Movies, Buckets_Movies.movie_id == Movie.id)
+        .filter(Buckets_Movies.bucket_id == bucket_id)
+        .order_by(Movie.id)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+    batch = []
+    for movie in query:
+        batch.append(movie)
+
+        if len(batch) == EXPORT_BATCH_SIZE:
+            yield batch
+            batch = []
 
-    serialized_movies = [movie.serialize() for movie in bucket.movies]
-    return serialized_movies
+    if batch:
+        yield batch
+
+
+def export_movies_ndjson(bucket_id: int):
+    """Yields a bucket's movies as newline-delimited JSON"""
+
+    for batch in iter_bucket_movies(bucket_id):
+        yield "".join(json.dumps(movie.serialize()) + "\n" for movie in batch)
+
+
+def export_movies_csv(bucket_id: int):
+    """Yields a bucket's movies as CSV with a header row"""
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(EXPORT_FIELDS)
+
+    for batch in iter_bucket_movies(bucket_id):
+        writer.writerows(
+            [getattr(movie, field) for field in EXPORT_FIELDS] for movie in batch
+        )
+        yield buffer.getvalue()
+
+        buffer.seek(0)
+        buffer.truncate()
+
+    # header only for an empty bucket
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def filtered_movies_query(bucket_id: int, filters: Dict):
+    """Query for a bucket's movies, filtered and sorted in SQL"""
+
+    query = Movie.query.join(
+        Buckets_Movies, Buckets_Movies.movie_id == Movie.id
+    ).filter(Buckets_Movies.bucket_id == bucket_id)
+
+    query = apply_movie_filters(query, filters)
+
+    sort = filters.get("sort") or "id"
+    column = MOVIE_SORT_FIELDS[sort.lstrip("-")]
+    ordering = column.desc() if sort.startswith("-") else column.asc()
+
+    return query.order_by(ordering.nullslast(), Movie.id)
+
+
+def get_filtered_movies(bucket_id: int, filters: Dict) -> List[Dict]:
+    """Serializes a bucket's movies, filtered and sorted in SQL"""
+
+    return [movie.serialize() for movie in filtered_movies_query(bucket_id, filters)]
+
+
+def iter_filtered_movies(bucket_id: int, filters: Dict):
+    """Yields a bucket's serialized movies, filtered and sorted in SQL, from
+    a server-side cursor"""
+
+    query = filtered_movies_query(bucket_id, filters).yield_per(EXPORT_BATCH_SIZE)
+
+    for movie in query:
+        yield movie.serialize()
+
+
+def pick_random_movies(bucket_id: int, filters: Dict, k: int) -> List[Dict]:
+    """Serializes k random unwatched movies from a bucket.
+
+    Counts the matching rows, then numbers them along the (bucket_id,
+    movie_id) primary key and fetches every sampled position in one pass,
+    so the bucket is never sorted randomly.
+    """
+
+    query = Movie.query.join(
+        Buckets_Movies, Buckets_Movies.movie_id == Movie.id
+    ).filter(Buckets_Movies.bucket_id == bucket_id)
+
+    query = apply_movie_filters(query, {**filters, "watched": False})
+
+    count = query.order_by(None).count()
+    positions = random.sample(range(1, count + 1), min(k, count))
+
+    if not positions:
+        return []
+
+    ranked = (
+        query.order_by(None)
+        .with_entities(
+            Movie.id.label("movie_id"),
+            func.row_number().over(order_by=Buckets_Movies.movie_id).label("rn"),
+        )
+        .subquery()
+    )
+
+    rows = (
+        db.session.query(Movie, ranked.c.rn)
+        .join(ranked, ranked.c.movie_id == Movie.id)
+        .filter(ranked.c.rn.in_(positions))
+        .all()
+    )
+    picks = {rn: movie for movie, rn in rows}
+
+    # keep the sampled order, a movie removed after counting leaves its
+    # position past the end
+    return [picks[rn].serialize() for rn in positions if rn in picks]
+
+
+def get_bucket_suggestions(bucket_id: int, limit: int) -> List[Dict]:
+    """Serializes movies most similar to a bucket's movies that aren't in it
+    yet, from the precomputed neighbour table in a single query"""
+
+    bucket_movie_ids = db.session.query(Buckets_Movies.movie_id).filter(
+        Buckets_Movies.bucket_id == bucket_id
+    )
+    score = func.sum(MovieNeighbour.score).label("score")
+
+    suggestions = (
+        db.session.query(Movie, score)
+        .join(MovieNeighbour, MovieNeighbour.neighbour_id == Movie.id)
+        .filter(MovieNeighbour.movie_id.in_(bucket_movie_ids))
+        .filter(MovieNeighbour.neighbour_id.notin_(bucket_movie_ids))
+        .group_by(Movie.id)
+        .order_by(score.desc(), Movie.id)
+        .limit(limit)
+    )
+
+    return [{**movie.serialize(), "score": score} for movie, score in suggestions]
+
+
+def get_buckets_containing(user_id: int, movie_ids: List[int]) -> Dict[int, List[int]]:
+    """Maps each movie to the ids of the user's buckets that hold it, for a
+    whole page of movies in one query"""
+
+    rows = (
+        db.session.query(Buckets_Movies.movie_id, Buckets_Movies.bucket_id)
+        .join(User_Buckets, User_Buckets.bucket_id == Buckets_Movies.bucket_id)
+        .join(Bucket, Bucket.id == Buckets_Movies.bucket_id)
+        .filter(
+            User_Buckets.user_id == user_id,
+            Buckets_Movies.movie_id.in_(movie_ids),
+            Bucket.deleted_at.is_(None),
+        )
+        .order_by(Buckets_Movies.bucket_id)
+    )
+
+    bucket_ids = {}
+    for movie_id, bucket_id in rows:
+        bucket_ids.setdefault(movie_id, []).append(bucket_id)
+
+    return bucket_ids
 
 
 def get_all_buckets(user: User) -> List[Dict]:
     """Serializes all buckets tied to a user"""
 
-    serialized_buckets = [bucket.serialize() for bucket in user.buckets]
+    serialized_buckets = [
+        bucket.serialize() for bucket in user.buckets if bucket.deleted_at is None
+    ]
     return serialized_buckets
 
 
+def iter_user_buckets(user_id: int):
+    """Yields the user's serialized buckets from a server-side cursor"""
+
+    query = (
+        Bucket.query.join(User_Buckets, User_Buckets.bucket_id == Bucket.id)
+        .filter(User_Buckets.user_id == user_id, Bucket.deleted_at.is_(None))
+        .order_by(Bucket.id)
+        .yield_per(EXPORT_BATCH_SIZE)
+    )
+
+    for bucket in query:
+        yield bucket.serialize()
+
+
 def get_auth_users(bucket: Bucket) -> List[Dict]:
     """Serializes all auth users tied to a bucket"""
 
@@ -412,6 +874,102 @@ def is_user_authorized(bucket: Bucket, user_id: int) -> bool:
     return user_id in user_ids
 
 
+def parse_movie_filters(args) -> Dict:
+    """Read sort/filter query params, dropping any that don't parse"""
+
+    filters = {
+        "genre": args.get("genre"),
+        "year_from": args.get("year_from", type=int),
+        "year_to": args.get("year_to", type=int),
+        "max_runtime": args.get("max_runtime", type=int),
+    }
+
+    watched = args.get("watched", "").lower()
+    if watched in ("true", "false"):
+        filters["watched"] = watched == "true"
+
+    sort = args.get("sort")
+    if sort and sort.lstrip("-") in MOVIE_SORT_FIELDS:
+        filters["sort"] = sort
+
+    # year ranges become dates, year_to's exclusive end must be one too
+    for key in ("year_from", "year_to"):
+        if filters[key] is not None and not MINYEAR <= filters[key] < MAXYEAR:
+            filters[key] = None
+
+    return {key: value for key, value in filters.items() if value is not None}
+
+
+def apply_movie_filters(query, filters: Dict):
+    """Narrow a movie query by genre, watched, year range and max runtime"""
+
+    if "genre" in filters:
+        query = query.filter(Movie.genre.ilike(f"%{filters['genre']}%"))
+
+    if "watched" in filters:
+        if filters["watched"]:
+            query = query.filter(Movie.is_watched.is_(True))
+        else:
+            query = query.filter(
+                or_(Movie.is_watched.is_(False), Movie.is_watched.is_(None))
+            )
+
+    if "year_from" in filters:
+        query = query.filter(Movie.release_date >= date(filters["year_from"], 1, 1))
+
+    if "year_to" in filters:
+        query = query.filter(Movie.release_date < date(filters["year_to"] + 1, 1, 1))
+
+    if "max_runtime" in filters:
+        query = query.filter(Movie.runtime <= filters["max_runtime"])
+
+    return query
+
+
+def filters_signature(filters: Dict) -> str:
+    """Stable cache variant for a set of filters"""
+
+    return urlencode(sorted(filters.items()))
+
+
+def parse_runtime(value) -> Optional[int]:
+    """Parse a runtime like 120, "120", "120 min" or "2h 5m" into minutes"""
+
+    if value is None or isinstance(value, int):
+        return value
+
+    hours, minutes = RUNTIME_PATTERN.match(str(value)).groups()
+
+    if hours is None and minutes is None:
+        return None
+
+    return int(hours or 0) * 60 + int(minutes or 0)
+
+
+def parse_release_date(value) -> Optional[date]:
+    """Parse a release date like "2022-01-31" or "2022" into a date"""
+
+    if value is None or isinstance(value, date):
+        return value
+
+    value = str(value).strip()
+
+    try:
+        if len(value) == 4:
+            return date(int(value), 1, 1)
+
+        return date.fromisoformat(value[:10])
+
+    except ValueError:
+        return None
+
+
+def is_user_listed(users: List[Dict], user_id: int) -> bool:
+    """Verifies if user is among serialized auth users"""
+
+    return any(user["id"] == user_id for user in users)
+
+
 def generate_invite_code(length: int) -> str:
     """Generate a code with only uppercase and digits based on given length"""
 
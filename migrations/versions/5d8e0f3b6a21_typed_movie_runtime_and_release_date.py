@@ -0,0 +1,127 @@
+"""Typed movies.runtime and movies.release_date
+
+Revision ID: 5d8e0f3b6a21
+Revises: b72e4a1c9d05
+Create Date: 2026-10-18 13:05:52.774310
+
+"""
+import re
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8e0f3b6a21'
+down_revision = 'b72e4a1c9d05'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+RUNTIME_PATTERN = re.compile(r"\s*(?:(\d+)\s*h[a-z]*)?\s*(\d+)?", re.IGNORECASE)
+
+
+def parse_runtime(value):
+    # frozen copy of helpers.parse_runtime
+    if value is None:
+        return None
+
+    hours, minutes = RUNTIME_PATTERN.match(value).groups()
+
+    if hours is None and minutes is None:
+        return None
+
+    return int(hours or 0) * 60 + int(minutes or 0)
+
+
+def parse_release_date(value):
+    # frozen copy of helpers.parse_release_date
+    if value is None:
+        return None
+
+    value = value.strip()
+
+    try:
+        if len(value) == 4:
+            return date(int(value), 1, 1)
+
+        return date.fromisoformat(value[:10])
+
+    except ValueError:
+        return None
+
+
+def upgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('runtime_minutes', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('release_on', sa.Date(), nullable=True))
+
+    movies = sa.table(
+        'movies',
+        sa.column('id', sa.Integer),
+        sa.column('runtime', sa.Text),
+        sa.column('release_date', sa.Text),
+        sa.column('runtime_minutes', sa.Integer),
+        sa.column('release_on', sa.Date),
+    )
+
+    connection = op.get_bind()
+    last_id = None
+
+    # backfill in id-ordered batches so no single statement holds every row
+    while True:
+        query = sa.select(movies.c.id, movies.c.runtime, movies.c.release_date)
+        if last_id is not None:
+            query = query.where(movies.c.id > last_id)
+
+        rows = connection.execute(
+            query.order_by(movies.c.id).limit(BACKFILL_BATCH_SIZE)
+        ).fetchall()
+
+        if not rows:
+            break
+
+        connection.execute(
+            movies.update()
+            .where(movies.c.id == sa.bindparam('movie_id'))
+            .values(
+                runtime_minutes=sa.bindparam('minutes'),
+                release_on=sa.bindparam('released'),
+            ),
+            [
+                {
+                    'movie_id': row.id,
+                    'minutes': parse_runtime(row.runtime),
+                    'released': parse_release_date(row.release_date),
+                }
+                for row in rows
+            ],
+        )
+
+        last_id = rows[-1].id
+
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.drop_column('runtime')
+        batch_op.drop_column('release_date')
+        batch_op.alter_column('runtime_minutes', new_column_name='runtime')
+        batch_op.alter_column('release_on', new_column_name='release_date')
+        batch_op.create_index(batch_op.f('ix_movies_runtime'), ['runtime'], unique=False)
+        batch_op.create_index(batch_op.f('ix_movies_release_date'), ['release_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('movies', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_movies_release_date'))
+        batch_op.drop_index(batch_op.f('ix_movies_runtime'))
+        batch_op.alter_column(
+            'runtime',
+            type_=sa.Text(),
+            postgresql_using="runtime::text || ' min'",
+        )
+        batch_op.alter_column(
+            'release_date',
+            type_=sa.Text(),
+            postgresql_using="to_char(release_date, 'YYYY-MM-DD')",
+        )
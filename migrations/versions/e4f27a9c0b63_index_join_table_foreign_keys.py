@@ -0,0 +1,37 @@
+"""Index join table foreign keys
+
+Revision ID: e4f27a9c0b63
+Revises: c19b7d3e5f48
+Create Date: 2026-10-18 17:02:44.865120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4f27a9c0b63'
+down_revision = 'c19b7d3e5f48'
+branch_labels = None
+depends_on = None
+
+
+# these tables are large and written constantly, build the indexes
+# concurrently so writes aren't blocked for the whole build. CONCURRENTLY
+# can't run inside a transaction.
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(op.f('ix_bucket_links_bucket_id'), 'bucket_links', ['bucket_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_buckets_movies_movie_id'), 'buckets_movies', ['movie_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_movie_neighbours_neighbour_id'), 'movie_neighbours', ['neighbour_id'], unique=False, postgresql_concurrently=True)
+        op.create_index(op.f('ix_user_buckets_bucket_id'), 'user_buckets', ['bucket_id'], unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(op.f('ix_user_buckets_bucket_id'), table_name='user_buckets', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_movie_neighbours_neighbour_id'), table_name='movie_neighbours', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_buckets_movies_movie_id'), table_name='buckets_movies', postgresql_concurrently=True)
+        op.drop_index(op.f('ix_bucket_links_bucket_id'), table_name='bucket_links', postgresql_concurrently=True)
@@ -3,8 +3,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from flask_bcrypt import Bcrypt
+from datetime import datetime
+from werkzeug.http import http_date
+from movie_bucket.db_routing import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 bcrypt = Bcrypt()
 
 
@@ -27,13 +30,16 @@ class Movie(db.Model):
     )
 
     release_date = db.Column(
-        db.Text,
+        db.Date,
         default=None,
+        index=True,
     )
 
+    # in minutes
     runtime = db.Column(
-        db.Text,
+        db.Integer,
         default=None,
+        index=True,
     )
 
     genre = db.Column(
@@ -51,6 +57,12 @@ class Movie(db.Model):
         default=False,
     )
 
+    # set once TMDB details have been looked up, found or not
+    details_synced_at = db.Column(
+        db.DateTime,
+        default=None,
+    )
+
     def serialize(self):
         """Serializes all information tied to a movie"""
 
@@ -64,7 +76,7 @@ class Movie(db.Model):
             data["image"] = self.image
 
         if self.release_date is not None:
-            data["release_date"] = self.release_date
+            data["release_date"] = self.release_date.isoformat()
 
         if self.runtime is not None:
             data["runtime"] = self.runtime
@@ -176,6 +188,13 @@ class Bucket(db.Model):
         default=None,
     )
 
+    # set when the bucket is deleted, its rows are purged in the background
+    deleted_at = db.Column(
+        db.DateTime,
+        default=None,
+        index=True,
+    )
+
     def serialize(self):
         """Serializes all information tied to a bucket"""
 
@@ -208,7 +227,8 @@ class BucketLink(db.Model):
 
     bucket_id = db.Column(
         db.Integer,
-        db.ForeignKey('buckets.id')
+        db.ForeignKey('buckets.id'),
+        index=True
     )
 
     invite_code = db.Column(
@@ -228,7 +248,7 @@ class BucketLink(db.Model):
             "id": self.id,
             "bucket_id": self.bucket_id,
             "invite_code": self.invite_code,
-            "expiration_date": self.expiration_date
+            "expiration_date": http_date(self.expiration_date),
         }
 
         return data
@@ -252,6 +272,7 @@ class User_Buckets(db.Model):
         db.ForeignKey("buckets.id", ondelete="CASCADE"),
         nullable=False,
         primary_key=True,
+        index=True,
     )
 
 
@@ -272,13 +293,137 @@ class Buckets_Movies(db.Model):
         db.ForeignKey("movies.id", ondelete="CASCADE"),
         nullable=False,
         primary_key=True,
+        index=True,
+    )
+
+    # null for links made before this was tracked
+    added_at = db.Column(
+        db.DateTime,
+        default=datetime.now,
+        index=True,
+    )
+
+
+class BucketChange(db.Model):
+    """Append-only log of changes made to a bucket, ordered by seq"""
+
+    __tablename__ = "bucket_changes"
+
+    __table_args__ = (
+        db.Index("ix_bucket_changes_bucket_id_id", "bucket_id", "id"),
+        db.Index("ix_bucket_changes_bucket_id_seq", "bucket_id", "seq"),
+        db.Index("ix_bucket_changes_seq", "seq"),
+    )
+
+    # only INTEGER PRIMARY KEY autoincrements on SQLite
+    id = db.Column(
+        db.BigInteger().with_variant(db.Integer, "sqlite"),
+        primary_key=True,
+    )
+
+    # assigned at commit in commit order, see change_feed; NULL until then
+    seq = db.Column(
+        db.BigInteger,
+        default=None,
+    )
+
+    bucket_id = db.Column(
+        db.Integer,
+        db.ForeignKey("buckets.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    # one of "bucket", "movie" or "user"
+    entity = db.Column(
+        db.String(16),
+        nullable=False,
+    )
+
+    entity_id = db.Column(
+        db.Integer,
+        nullable=False,
+    )
+
+    # "upsert" carries the full entity in data, "delete" is a tombstone
+    op = db.Column(
+        db.String(8),
+        nullable=False,
+    )
+
+    data = db.Column(
+        db.JSON,
+        default=None,
+    )
+
+    created_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.now,
+    )
+
+    def serialize(self):
+        """Serializes all information tied to a bucket change"""
+
+        data = {
+            "id": self.id,
+            "seq": self.seq,
+            "bucket_id": self.bucket_id,
+            "entity": self.entity,
+            "entity_id": self.entity_id,
+            "op": self.op,
+        }
+
+        if self.data is not None:
+            data["data"] = self.data
+
+        return data
+
+
+class ChangeFeedPosition(db.Model):
+    """Single row holding the last seq handed to bucket changes"""
+
+    __tablename__ = "change_feed_position"
+
+    id = db.Column(
+        db.Integer,
+        primary_key=True,
+    )
+
+    position = db.Column(
+        db.BigInteger,
+        nullable=False,
+        default=0,
     )
 
 
+db.event.listen(
+    ChangeFeedPosition.__table__,
+    "after_create",
+    db.DDL("INSERT INTO change_feed_position (id, position) VALUES (1, 0)"),
+)
+
+
+class MovieNeighbour(db.Model):
+    """Precomputed top-N similar movies, by bucket co-occurrence"""
+
+    __tablename__ = "movie_neighbours"
+
+    movie_id = db.Column(
+        db.Integer,
+        db.ForeignKey("movies.id", ondelete="CASCADE"),
+        nullable=False,
+        primary_key=True,
+    )
 
-def connect_db(app):
-    """Connect db to app"""
+    neighbour_id = db.Column(
+        db.Integer,
+        db.ForeignKey("movies.id", ondelete="CASCADE"),
+        nullable=False,
+        primary_key=True,
+        index=True,
+    )
 
-    app.app_context().push()
-    db.app = app
-    db.init_app(app)
+    score = db.Column(
+        db.Float,
+        nullable=False,
+    )
@@ -1,66 +1,106 @@
 import os
-import requests
+import hmac
+import json
+import uuid
 import helpers
+import functools
 
-from dotenv import load_dotenv
 from flask_login import LoginManager, login_user, logout_user
+from redis.exceptions import RedisError
 from sqlalchemy.exc import IntegrityError
 from flask_migrate import Migrate
 from flask_jwt_extended import (
     create_access_token,
-    jwt_required,
     get_jwt_identity,
+    verify_jwt_in_request,
     JWTManager,
 )
-
-from typing import Optional
-from flask import Flask, request, jsonify
-from celery import Celery
-from models import db, connect_db, User
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
+
+from typing import List, Optional
+from flask import (
+    Blueprint,
+    Flask,
+    Response,
+    current_app,
+    g,
+    request,
+    stream_with_context,
+)
+from models import db, User
 from flask_cors import CORS
+from movie_bucket import (
+    batch,
+    cache,
+    change_feed,
+    db_routing,
+    enrichment,
+    idempotency,
+    importer,
+    rate_limit,
+    schemas,
+    streaming,
+    tmdb,
+    trending,
+)
+from movie_bucket.celery_app import celery
+from movie_bucket.config import configure_app
+from movie_bucket.redis_client import get_redis
 
-load_dotenv()
+bp = Blueprint("movie_bucket", __name__)
 
-app = Flask(__name__)
+# owners of tasks started by users, kept as long as celery keeps results
+TASK_OWNER_KEY = "task:{}:user"
+TASK_OWNER_TTL_SECONDS = 86400
 
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ["DATABASE_URL"]
-app.config["SQLALCHEMY_ECHO"] = False
-app.config["API_KEY"] = os.environ["API_KEY"]
-app.config["AUTH_KEY"] = os.environ["AUTH_KEY"]
-app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY")
-app.config["ADMIN_TOKEN"] = os.environ["ADMIN_TOKEN"]
-app.secret_key = os.environ.get("FLASK_SECRET_KEY")
-app.config["JWT_TOKEN_LOCATION"] = ["headers", "cookies"]
+jwt = JWTManager()
+migrate = Migrate()
+login_manager = LoginManager()
+cors = CORS()
 
-jwt = JWTManager(app)
 
-connect_db(app)
+def create_app(test_config=None) -> Flask:
+    """Create and configure the web app. Nothing is set up at import time,
+    so workers and tools importing this module stay cheap."""
 
-migrate = Migrate(app, db)
+    app = Flask(__name__)
 
-login_manager = LoginManager()
-login_manager.init_app(app)
+    configure_app(app)
+    app.config["API_KEY"] = os.environ["API_KEY"]
+    app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY")
+    app.config["ADMIN_TOKEN"] = os.environ["ADMIN_TOKEN"]
+    app.secret_key = os.environ.get("FLASK_SECRET_KEY")
+    app.config["JWT_TOKEN_LOCATION"] = ["headers", "cookies"]
+    app.config["RATE_LIMIT_ENABLED"] = os.environ.get("RATE_LIMIT_ENABLED") != "false"
+    app.config["RATE_LIMIT_BACKEND"] = os.environ.get("RATE_LIMIT_BACKEND", "memory")
+    app.config["RATE_LIMITS"] = json.loads(os.environ.get("RATE_LIMITS", "{}"))
+    app.config["VALIDATE_RESPONSES"] = os.environ.get("VALIDATE_RESPONSES") == "true"
 
-celery = Celery(
-    'movie_bucket',
-    broker='redis://localhost',
-)
+    if test_config is not None:
+        app.config.update(test_config)
+
+    db_routing.configure_engines(app)
+    db.init_app(app)
+
+    jwt.init_app(app)
+    migrate.init_app(app, db)
+    login_manager.init_app(app)
+    cors.init_app(app, origins="http://localhost:5173*")
+
+    app.register_blueprint(bp)
 
-cors = CORS(app, origins="http://localhost:5173*")
+    return app
 
-AUTH_KEY = app.config["AUTH_KEY"]
 
-HEADERS = {"accept": "application/json", "Authorization": f"Bearer {AUTH_KEY}"}
-BASE_API_URL = "https://api.themoviedb.org/3/"
-TARGET_FIELDS_FOR_API = ["id", "title", "poster_path", "release_date", "overview"]
+@bp.after_app_request
+def keep_writers_on_primary(response):
+    """Read-your-writes: route the writer's next reads to the primary"""
 
-MOVIE_FIELD_MAP = {
-    "id": "id",
-    "title": "title",
-    "poster_path": "image",
-    "release_date": "release_date",
-    "overview": "bio",
-}
+    if g.get("db_wrote"):
+        db_routing.mark_write(db_routing.current_identity())
+
+    return response
 
 
 ########################################################
@@ -78,22 +118,17 @@ def load_user(user_id: int) -> Optional[User]:
         return None
 
 
-@app.route("/signup", methods=["GET", "POST"])
-def signup() -> jsonify:
+@bp.route("/signup", methods=["GET", "POST"])
+@schemas.body(schemas.SignupBody)
+def signup(body: schemas.SignupBody) -> Response:
     """Signs up a user, returns JSON w/message and success status"""
 
-    data = request.get_json()
-
-    username: str = data.get("username")
-    email: str = data.get("email")
-    password: str = data.get("password")
-
     # Successful signup
     try:
         user = User.signup(
-            username=username,
-            email=email,
-            password=password,
+            username=body.username,
+            email=body.email,
+            password=body.password,
         )
 
         db.session.commit()
@@ -104,7 +139,7 @@ def signup() -> jsonify:
         )
         response.update({"access_token": access_token, "user": user.serialize()})
 
-        return jsonify(response)
+        return schemas.respond(response, schemas.AuthOut)
 
     # Failed signup
     except IntegrityError as err:
@@ -113,18 +148,17 @@ def signup() -> jsonify:
             message=f"{error_message}", success=False, status="Bad Request"
         )
 
-        return jsonify(response)
+        return schemas.respond(response)
 
 
-@app.post("/login")
-def login() -> jsonify:
+@bp.post("/login")
+@schemas.body(schemas.Credentials)
+def login(body: schemas.Credentials) -> Response:
     """Authenticates user and logs them in.
     Returns JSON w/message and success status"""
 
-    data = request.get_json()
-
-    username: str = data.get("username")
-    password: str = data.get("password")
+    username: str = body.username
+    password: str = body.password
 
     user = User.query.filter_by(username=username).first()
 
@@ -133,23 +167,25 @@ def login() -> jsonify:
         login_user(user)
         response = helpers.create_response("logged in", True, "OK")
         response.update({"access_token": access_token, "user": user.serialize()})
-    else:
-        # Failed login
-        response = helpers.create_response(
-            message="invalid credentials", success=False, status="Unauthorized"
-        )
 
-    return jsonify(response)
+        return schemas.respond(response, schemas.AuthOut)
+
+    # Failed login
+    response = helpers.create_response(
+        message="invalid credentials", success=False, status="Unauthorized"
+    )
 
+    return schemas.respond(response)
 
-@app.post("/logout")
-@jwt_required()
-def logout() -> jsonify:
+
+@bp.post("/logout")
+@batch.jwt_required_once
+def logout() -> Response:
     """Clears session and logs user out"""
 
     logout_user()
 
-    return jsonify(
+    return schemas.respond(
         helpers.create_response(message="logout successful", success=True, status="OK")
     )
 
@@ -158,36 +194,96 @@ def logout() -> jsonify:
 ###-------------------------------------API SEARCH ROUTE
 
 
-@app.route("/api/search/movies")
-def list_search_results() -> jsonify:
-    """Returns JSON list of search results"""
+def identify_if_annotating(view):
+    """Verify the caller's JWT only when search results are annotated with
+    their buckets. Plain search ignores the Authorization header, and a
+    stale or invalid token falls back to an anonymous search. In a batch,
+    the batch's identity is used."""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.args.get("annotate") == "buckets" and not batch.has_identity():
+            try:
+                verify_jwt_in_request(optional=True)
+            except (JWTExtendedException, PyJWTError):
+                pass
+
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+@bp.route("/api/search/movies")
+@identify_if_annotating
+@rate_limit.limit("search", per_second=2, burst=10)
+@db_routing.read_only
+def list_search_results() -> Response:
+    """Returns JSON list of search results, movies trending in Movie Bucket
+    first. With annotate=buckets and a logged in user, each result lists the
+    user's buckets holding it"""
 
     query = request.args.get("query")
+    annotate = request.args.get("annotate")
+    user_id: Optional[int] = db_routing.current_identity()
+
+    filtered_results = tmdb.search_movies(query)
+
+    try:
+        popularity = trending.get_popularity(
+            [result["id"] for result in filtered_results]
+        )
+    except RedisError as err:
+        current_app.logger.warning("failed to rank search results: %s", err)
+        popularity = {}
+
+    # stable, so TMDB's relevance order holds among equally popular movies
+    filtered_results.sort(key=lambda result: -popularity.get(result["id"], 0.0))
+
+    if annotate == "buckets" and user_id is not None:
+        bucket_ids = helpers.get_buckets_containing(
+            user_id, [result["id"] for result in filtered_results]
+        )
+
+        for result in filtered_results:
+            result["bucket_ids"] = bucket_ids.get(result["id"], [])
+
+    return schemas.respond(filtered_results, List[schemas.SearchResultOut])
+
+
+@bp.get("/movies/trending")
+@helpers.performance_timer
+def list_trending_movies() -> Response:
+    """Returns JSON list of trending (default) or most_added movies"""
 
-    url = f"{BASE_API_URL}search/movie"
-    params = {"query": query}
+    ranking = request.args.get("ranking", "trending")
+    limit = request.args.get("limit", default=20, type=int)
 
-    response = requests.get(url, params=params, headers=HEADERS)
-    data = response.json()
+    if ranking not in trending.RANKING_KEYS:
+        return schemas.respond(
+            helpers.create_response(
+                message="unknown ranking", success=False, status="Bad Request"
+            )
+        )
 
-    filtered_results = [
-        {MOVIE_FIELD_MAP[field]: result.get(field) for field in TARGET_FIELDS_FOR_API}
-        for result in data["results"]
-    ]
+    limit = max(1, min(limit, trending.RANKING_SIZE))
 
-    return jsonify(filtered_results)
+    return schemas.respond(
+        trending.get_ranking(ranking, limit), List[schemas.ScoredMovieOut]
+    )
 
 
 ########################################################
 ###---------------------------------------BUCKET ROUTES
 
 
-@app.get("/users/buckets")
-@jwt_required()
+@bp.get("/users/buckets")
+@batch.jwt_required_once
+@db_routing.read_only
 @helpers.performance_timer
-def get_user_buckets_or_bucket_info() -> jsonify:
+def get_user_buckets_or_bucket_info() -> Response:
     """Returns JSON list of all buckets associated with the authenticated user
-    or information about a single bucket if bucket_id is provided in query params"""
+    or information about a single bucket if bucket_id is provided in query params.
+    With stream=true the list is streamed from the database, uncached"""
 
     # TODO: might be better to leave types off variable declaration
     user_id: int = get_jwt_identity()
@@ -195,70 +291,78 @@ def get_user_buckets_or_bucket_info() -> jsonify:
 
     # If bucket_id is provided, retrieve information about a single bucket
     if bucket_id is not None:
-        bucket = helpers.get_bucket(bucket_id)
-        if bucket is None:
-            return jsonify(
+        response = cache.fetch(
+            cache.bucket_key(bucket_id, "info"),
+            lambda: helpers.get_bucket_info(bucket_id),
+        )
+
+        if response is None:
+            return schemas.respond(
                 helpers.create_response(
                     message="bucket not found", success=False, status="Not Found"
                 )
             )
 
-        if not helpers.is_user_authorized(bucket, user_id):
-            return jsonify(
+        if not helpers.is_user_listed(response["authorized_users"], user_id):
+            return schemas.respond(
                 helpers.create_response(
                     message="user not authorized", success=False, status="Unauthorized"
                 )
             )
 
-        users = helpers.get_auth_users(bucket)
-        response = {"bucket": bucket.serialize(), "authorized_users": users}
-        return jsonify(response)
+        return schemas.respond(response, schemas.BucketInfoOut)
 
     # Otherwise, retrieve all user buckets
-    user = helpers.get_user(user_id=user_id)
-    serialized_buckets = helpers.get_all_buckets(user)
+    if request.args.get("stream") == "true":
+        return streaming.stream_json_array(helpers.iter_user_buckets(user_id))
+
+    serialized_buckets = cache.fetch(
+        cache.user_key(user_id, "buckets"),
+        lambda: helpers.get_all_buckets(helpers.get_user(user_id=user_id)),
+    )
 
-    return jsonify(serialized_buckets)
+    return schemas.respond(serialized_buckets, List[schemas.BucketOut])
 
 
-@app.post("/users/buckets")
-@jwt_required()
+@bp.post("/users/buckets")
+@batch.jwt_required_once
+@idempotency.idempotent
+@schemas.body(schemas.NewBucketBody)
 @helpers.performance_timer
-def add_new_bucket() -> jsonify:
+def add_new_bucket(body: schemas.NewBucketBody) -> Response:
     """Adds a new bucket and returns JSON"""
 
     user_id: int = get_jwt_identity()
 
     user = helpers.get_user(user_id=user_id)
-    data = request.get_json()
-    response = helpers.add_bucket(user, data)
+    response = helpers.add_bucket(user, body)
 
-    return jsonify(response)
+    return schemas.respond(response, schemas.BucketCreatedOut)
 
 
-@app.delete("/users/buckets")
-@jwt_required()
+@bp.delete("/users/buckets")
+@batch.jwt_required_once
+@schemas.body(schemas.BucketRefBody)
 @helpers.performance_timer
-def delete_single_bucket() -> jsonify:
-    """Deletes specific bucket"""
-
-    data = request.get_json()
+def delete_single_bucket(body: schemas.BucketRefBody) -> Response:
+    """Deletes specific bucket. It disappears at once and its rows are purged
+    in the background, progress is at /users/tasks"""
 
     user_id: int = get_jwt_identity()
-    bucket_id: int = data.get("bucket_id")
+    bucket_id: int = body.bucket_id
 
     bucket = helpers.get_bucket(bucket_id)
     print("bucket in delete", bucket)
 
     if bucket is None:
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="bucket not found", success=False, status="Not Found"
             )
         )
 
     if not helpers.is_user_authorized(bucket, user_id):
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="user not authorized", success=False, status="Unauthorized"
             )
@@ -266,114 +370,338 @@ def delete_single_bucket() -> jsonify:
 
     response = helpers.delete_bucket(bucket)
 
-    return jsonify(response)
+    task = send_user_task(
+        "movie_bucket.tasks.purge_bucket", [bucket.id, user_id], user_id
+    )
+    response.update({"task_id": task.id})
 
+    return schemas.respond(response, schemas.TaskAcceptedOut)
 
-@app.patch("/users/buckets")
-@jwt_required()
+
+@bp.patch("/users/buckets")
+@batch.jwt_required_once
+@schemas.body(schemas.BucketPatchBody)
 @helpers.performance_timer
-def update_bucket_info() -> jsonify:
+def update_bucket_info(body: schemas.BucketPatchBody) -> Response:
     "Patches bucket resource"
 
     user_id: int = get_jwt_identity()
     bucket_id: int = request.args.get("bucket_id", type=int)
-    data = request.get_json()
 
     bucket = helpers.get_bucket(bucket_id)
 
     if bucket is None:
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="bucket not found", success=False, status="Not Found"
             )
         )
 
     if not helpers.is_user_authorized(bucket, user_id):
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="user not authorized", success=False, status="Unauthorized"
             )
         )
 
-    response = helpers.update_bucket(bucket, data)
+    response = helpers.update_bucket(bucket, body)
     response.update({"bucket": bucket.serialize()})
 
-    return jsonify(response)
+    return schemas.respond(response, schemas.BucketUpdatedOut)
 
 
-@app.get("/users/buckets/movies")
-@jwt_required()
+@bp.get("/users/buckets/movies")
+@batch.jwt_required_once
+@db_routing.read_only
 @helpers.performance_timer
-def get_all_movies_in_bucket() -> jsonify:
-    """Lists all movies that exist inside of a bucket"""
+def get_all_movies_in_bucket() -> Response:
+    """Lists all movies that exist inside of a bucket. Supports sort
+    (title, release_date, runtime, prefix "-" for descending) and genre,
+    watched, year_from, year_to and max_runtime filters. With stream=true
+    the list is streamed from the database, uncached"""
 
     user_id: int = get_jwt_identity()
     bucket_id: int = request.args.get("bucket_id", type=int)
+    filters = helpers.parse_movie_filters(request.args)
     print("get all buckets | bucket_id", bucket_id)
 
+    bucket_info = cache.fetch(
+        cache.bucket_key(bucket_id, "info"),
+        lambda: helpers.get_bucket_info(bucket_id),
+    )
+
+    if bucket_info is None:
+        return schemas.respond(
+            helpers.create_response(
+                message="bucket not found", success=False, status="Not Found"
+            )
+        )
+
+    if not helpers.is_user_listed(bucket_info["authorized_users"], user_id):
+        return schemas.respond(
+            helpers.create_response(
+                message="user not authorized", success=False, status="Unauthorized"
+            )
+        )
+
+    if request.args.get("stream") == "true":
+        return streaming.stream_json_array(
+            helpers.iter_filtered_movies(bucket_id, filters)
+        )
+
+    serialized_movies = cache.fetch(
+        cache.bucket_key(bucket_id, "movies"),
+        lambda: helpers.get_filtered_movies(bucket_id, filters),
+        variant=helpers.filters_signature(filters),
+    )
+    return schemas.respond(serialized_movies, List[schemas.MovieOut])
+
+
+@bp.get("/users/buckets/movies/random")
+@batch.jwt_required_once
+@db_routing.read_only
+@helpers.performance_timer
+def pick_random_movies_in_bucket() -> Response:
+    """Picks k (default 1) random unwatched movies from a bucket, optionally
+    filtered by genre, year_from, year_to and max_runtime"""
+
+    user_id: int = get_jwt_identity()
+    bucket_id: int = request.args.get("bucket_id", type=int)
+    k: int = request.args.get("k", default=1, type=int)
+    filters = helpers.parse_movie_filters(request.args)
+
     bucket = helpers.get_bucket(bucket_id)
 
     if bucket is None:
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="bucket not found", success=False, status="Not Found"
             )
         )
 
     if not helpers.is_user_authorized(bucket, user_id):
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="user not authorized", success=False, status="Unauthorized"
             )
         )
 
-    serialized_movies = helpers.get_all_movies(bucket)
-    return jsonify(serialized_movies)
+    k = max(1, min(k, helpers.RANDOM_PICK_MAX))
+    picks = helpers.pick_random_movies(bucket_id, filters, k)
 
+    return schemas.respond(picks, List[schemas.MovieOut])
 
-@app.post("/users/buckets/movies")
-@jwt_required()
+
+@bp.get("/users/buckets/suggestions")
+@batch.jwt_required_once
+@db_routing.read_only
 @helpers.performance_timer
-def add_new_movie_to_bucket() -> jsonify:
-    """Add a new movie to a bucket"""
+def get_suggestions_for_bucket() -> Response:
+    """Suggests movies for a bucket based on what other buckets hold"""
 
-    data = request.get_json()
+    user_id: int = get_jwt_identity()
+    bucket_id: int = request.args.get("bucket_id", type=int)
+    limit: int = request.args.get(
+        "limit", default=helpers.SUGGESTIONS_PAGE_SIZE, type=int
+    )
+
+    bucket = helpers.get_bucket(bucket_id)
+
+    if bucket is None:
+        return schemas.respond(
+            helpers.create_response(
+                message="bucket not found", success=False, status="Not Found"
+            )
+        )
+
+    if not helpers.is_user_authorized(bucket, user_id):
+        return schemas.respond(
+            helpers.create_response(
+                message="user not authorized", success=False, status="Unauthorized"
+            )
+        )
+
+    limit = max(1, min(limit, helpers.SUGGESTIONS_MAX_PAGE_SIZE))
+    suggestions = helpers.get_bucket_suggestions(bucket_id, limit)
+
+    return schemas.respond(suggestions, List[schemas.ScoredMovieOut])
+
+
+@bp.get("/users/buckets/export")
+@batch.jwt_required_once
+@db_routing.read_only
+def export_bucket() -> Response:
+    """Streams all movies inside of a bucket as NDJSON (default) or CSV"""
 
     user_id: int = get_jwt_identity()
-    bucket_id: int = data.get("bucket_id")
+    bucket_id: int = request.args.get("bucket_id", type=int)
+    export_format: str = request.args.get("format", "ndjson")
 
     bucket = helpers.get_bucket(bucket_id)
 
     if bucket is None:
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="bucket not found", success=False, status="Not Found"
             )
         )
 
     if not helpers.is_user_authorized(bucket, user_id):
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="user not authorized", success=False, status="Unauthorized"
             )
         )
 
-    data = request.get_json()
-    response = helpers.add_movie_to_bucket(bucket, data)
-    return jsonify(response)
+    if export_format == "csv":
+        rows = helpers.export_movies_csv(bucket_id)
+        mimetype = "text/csv"
+    elif export_format == "ndjson":
+        rows = helpers.export_movies_ndjson(bucket_id)
+        mimetype = "application/x-ndjson"
+    else:
+        return schemas.respond(
+            helpers.create_response(
+                message="unsupported export format",
+                success=False,
+                status="Bad Request",
+            )
+        )
+
+    filename = f"bucket-{bucket_id}.{export_format}"
+
+    return Response(
+        stream_with_context(rows),
+        mimetype=mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
 
 
-@app.patch("/users/buckets/movies")
-@jwt_required()
+@bp.post("/users/buckets/import")
+@batch.jwt_required_once
 @helpers.performance_timer
-def update_movie_watch_status() -> jsonify:
-    """Update movie is_watched status"""
+def import_movies_to_bucket() -> Response:
+    """Accepts an uploaded CSV/JSON watchlist and imports it in the background"""
+
+    user_id: int = get_jwt_identity()
+    bucket_id: int = request.args.get("bucket_id", type=int)
+    upload = request.files.get("file")
+
+    bucket = helpers.get_bucket(bucket_id)
+
+    if bucket is None:
+        return schemas.respond(
+            helpers.create_response(
+                message="bucket not found", success=False, status="Not Found"
+            )
+        )
+
+    if not helpers.is_user_authorized(bucket, user_id):
+        return schemas.respond(
+            helpers.create_response(
+                message="user not authorized", success=False, status="Unauthorized"
+            )
+        )
+
+    file_format = request.args.get("format")
+    if file_format is None and upload is not None:
+        file_format = os.path.splitext(upload.filename or "")[1].lstrip(".").lower()
+
+    if upload is None or file_format not in importer.IMPORT_FORMATS:
+        return schemas.respond(
+            helpers.create_response(
+                message="expected a csv or json file",
+                success=False,
+                status="Bad Request",
+            )
+        )
+
+    data = upload.read(importer.IMPORT_MAX_BYTES + 1)
+
+    if len(data) > importer.IMPORT_MAX_BYTES:
+        return schemas.respond(
+            helpers.create_response(
+                message=f"file is larger than {importer.IMPORT_MAX_BYTES} bytes",
+                success=False,
+                status="Bad Request",
+            )
+        )
+
+    try:
+        upload_key = importer.save_upload(data)
+    except RedisError as err:
+        current_app.logger.warning("failed to store import upload: %s", err)
+
+        return schemas.respond(
+            helpers.create_response(
+                message="import unavailable, try again later",
+                success=False,
+                status="Internal Server Error",
+            )
+        )
+
+    task = send_user_task(
+        "movie_bucket.tasks.import_watchlist",
+        [bucket_id, user_id, upload_key, file_format],
+        user_id,
+    )
+
+    response = helpers.create_response(
+        message="import accepted", success=True, status="Accepted"
+    )
+    response.update({"task_id": task.id})
 
-    data = request.get_json()
+    return schemas.respond(response, schemas.TaskAcceptedOut)
+
+
+@bp.post("/users/buckets/movies")
+@batch.jwt_required_once
+@idempotency.idempotent
+@schemas.body(schemas.NewMovieBody)
+@helpers.performance_timer
+def add_new_movie_to_bucket(body: schemas.NewMovieBody) -> Response:
+    """Add a new movie to a bucket"""
 
     user_id: int = get_jwt_identity()
-    bucket_id: str = data.get("bucket_id")
-    movie_id: str = data.get("movie_id")
+    bucket_id: int = body.bucket_id
+
+    bucket = helpers.get_bucket(bucket_id)
+
+    if bucket is None:
+        return schemas.respond(
+            helpers.create_response(
+                message="bucket not found", success=False, status="Not Found"
+            )
+        )
+
+    if not helpers.is_user_authorized(bucket, user_id):
+        return schemas.respond(
+            helpers.create_response(
+                message="user not authorized", success=False, status="Unauthorized"
+            )
+        )
+
+    response = helpers.add_movie_to_bucket(bucket, body)
+
+    if enrichment.needs_details(response["movie"]):
+        celery.send_task(
+            "movie_bucket.tasks.enrich_movie_details",
+            args=[[response["movie"]["id"]]],
+        )
+
+    return schemas.respond(response, schemas.MovieAddedOut)
+
+
+@bp.patch("/users/buckets/movies")
+@batch.jwt_required_once
+@schemas.body(schemas.BucketMovieBody)
+@helpers.performance_timer
+def update_movie_watch_status(body: schemas.BucketMovieBody) -> Response:
+    """Update movie is_watched status"""
+
+    user_id: int = get_jwt_identity()
+    bucket_id: int = body.bucket_id
+    movie_id: int = body.movie_id
 
     print("in patch route", bucket_id, movie_id)
 
@@ -381,21 +709,21 @@ def update_movie_watch_status() -> jsonify:
     movie = helpers.get_movie(movie_id)
 
     if bucket is None:
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="bucket not found", success=False, status="Not Found"
             )
         )
 
     if movie is None:
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="movie not found", success=False, status="Not Found"
             )
         )
 
     if not helpers.is_user_authorized(bucket, user_id):
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="user not authorized", success=False, status="Unauthorized"
             )
@@ -403,19 +731,18 @@ def update_movie_watch_status() -> jsonify:
 
     response = helpers.toggle_movie_watch_status(movie)
 
-    return jsonify(response)
+    return schemas.respond(response, schemas.MoviePatchedOut)
 
-@app.delete("/users/buckets/movies")
-@jwt_required()
+@bp.delete("/users/buckets/movies")
+@batch.jwt_required_once
+@schemas.body(schemas.BucketMovieBody)
 @helpers.performance_timer
-def delete_movie() -> jsonify:
+def delete_movie(body: schemas.BucketMovieBody) -> Response:
     """Delete movie"""
 
-    data = request.get_json()
-
     user_id: int = get_jwt_identity()
-    bucket_id: str = data.get("bucket_id")
-    movie_id: str = data.get("movie_id")
+    bucket_id: int = body.bucket_id
+    movie_id: int = body.movie_id
 
     bucket = helpers.get_bucket(bucket_id)
     movie = helpers.get_movie(movie_id)
@@ -423,21 +750,21 @@ def delete_movie() -> jsonify:
     print("bucket", bucket, movie)
 
     if bucket is None:
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="bucket not found", success=False, status="Not Found"
             )
         )
 
     if movie is None:
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="movie not found", success=False, status="Not Found"
             )
         )
 
     if not helpers.is_user_authorized(bucket, user_id):
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="user not authorized", success=False, status="Unauthorized"
             )
@@ -445,17 +772,189 @@ def delete_movie() -> jsonify:
 
     response = helpers.delete_movie(movie)
 
-    return jsonify(response)
+    return schemas.respond(response)
+
+
+########################################################
+###------------------------------------------SYNC ROUTES
+
+
+@bp.get("/users/buckets/changes")
+@batch.jwt_required_once
+@helpers.performance_timer
+def get_bucket_changes() -> Response:
+    """Lists changes made to a bucket after the given cursor"""
+
+    user_id: int = get_jwt_identity()
+    bucket_id: int = request.args.get("bucket_id", type=int)
+    cursor: int = request.args.get("since", default=0, type=int)
+    limit: int = request.args.get(
+        "limit", default=helpers.CHANGE_FEED_PAGE_SIZE, type=int
+    )
+
+    bucket = helpers.get_bucket(bucket_id)
+
+    if bucket is None:
+        return schemas.respond(
+            helpers.create_response(
+                message="bucket not found", success=False, status="Not Found"
+            )
+        )
+
+    if not helpers.is_user_authorized(bucket, user_id):
+        return schemas.respond(
+            helpers.create_response(
+                message="user not authorized", success=False, status="Unauthorized"
+            )
+        )
+
+    limit = max(1, min(limit, helpers.CHANGE_FEED_MAX_PAGE_SIZE))
+    response = helpers.get_changes_since(bucket, cursor, limit)
+
+    return schemas.respond(response, schemas.ChangesOut)
+
+
+@bp.get("/users/buckets/events")
+@batch.jwt_required_once
+def stream_bucket_events() -> Response:
+    """Streams changes made to a bucket as server-sent events. Resumes after
+    the Last-Event-ID header (or last_event_id param) when reconnecting"""
+
+    user_id: int = get_jwt_identity()
+    bucket_id: int = request.args.get("bucket_id", type=int)
+    last_event_id: int = request.headers.get("Last-Event-ID", type=int)
+
+    if last_event_id is None:
+        last_event_id = request.args.get("last_event_id", type=int)
+
+    bucket = helpers.get_bucket(bucket_id)
+
+    if bucket is None:
+        return schemas.respond(
+            helpers.create_response(
+                message="bucket not found", success=False, status="Not Found"
+            )
+        )
+
+    if not helpers.is_user_authorized(bucket, user_id):
+        return schemas.respond(
+            helpers.create_response(
+                message="user not authorized", success=False, status="Unauthorized"
+            )
+        )
+
+    events = change_feed.stream_changes(bucket.id, last_event_id)
+
+    return Response(
+        events,
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+########################################################
+###------------------------------------------TASK ROUTES
+
+
+def send_user_task(name: str, args: List, user_id: int):
+    """Enqueue a task on behalf of a user. The owner is recorded before the
+    task exists, so /users/tasks can authorize them whatever its result"""
+
+    task_id = str(uuid.uuid4())
+
+    try:
+        get_redis().set(
+            TASK_OWNER_KEY.format(task_id), user_id, ex=TASK_OWNER_TTL_SECONDS
+        )
+    except RedisError as err:
+        current_app.logger.warning("failed to record owner of %s: %s", task_id, err)
+
+    return celery.send_task(name, args=args, task_id=task_id)
+
+
+def get_task_owner(task_id: str) -> Optional[int]:
+    """User who started a task, None if unknown"""
+
+    try:
+        owner = get_redis().get(TASK_OWNER_KEY.format(task_id))
+    except RedisError as err:
+        current_app.logger.warning("failed to read owner of %s: %s", task_id, err)
+        return None
+
+    return int(owner) if owner is not None else None
+
+
+@bp.get("/users/tasks")
+@batch.jwt_required_once
+@helpers.performance_timer
+def get_task_progress() -> Response:
+    """Reports the state and progress of a background task started by the user"""
+
+    user_id: int = get_jwt_identity()
+    task_id: str = request.args.get("task_id")
+
+    if not task_id:
+        return schemas.respond(
+            helpers.create_response(
+                message="task_id is required", success=False, status="Bad Request"
+            )
+        )
+
+    result = celery.AsyncResult(task_id)
+    owner = get_task_owner(task_id)
+
+    # unknown task ids report as PENDING, so this leaks nothing
+    if owner != user_id and (owner is not None or result.state != "PENDING"):
+        return schemas.respond(
+            helpers.create_response(
+                message="user not authorized", success=False, status="Unauthorized"
+            )
+        )
+
+    # a failed task's info is its exception, only report the state
+    progress = result.info if isinstance(result.info, dict) else {}
+    response = {"task_id": task_id, "state": result.state}
+
+    if progress:
+        response["progress"] = progress
+
+    return schemas.respond(response, schemas.TaskOut)
+
+
+########################################################
+###-----------------------------------------BATCH ROUTES
+
+
+@bp.post("/batch")
+@batch.jwt_required_once
+@schemas.body(schemas.BatchBody)
+@helpers.performance_timer
+def run_batch(body: schemas.BatchBody) -> Response:
+    """Runs several requests to other routes in one round trip. Returns the
+    status and body of each, in order"""
+
+    if len(body.requests) > batch.BATCH_MAX_REQUESTS:
+        return schemas.respond(
+            helpers.create_response(
+                message="too many requests in batch",
+                success=False,
+                status="Bad Request",
+            )
+        )
+
+    responses = batch.run(body.requests, parallel=body.parallel)
+
+    return schemas.respond(responses, List[schemas.SubResponseOut])
 
 
 ########################################################
 ###------------------------------------------LINK ROUTES
 
 
-@app.get("/users/buckets/invite")
-@jwt_required()
+@bp.get("/users/buckets/invite")
+@batch.jwt_required_once
 @helpers.performance_timer
-def invite_user_to_collaborate() -> jsonify:
+def invite_user_to_collaborate() -> Response:
     """Generates invitation code for user to collaborate on a bucket"""
 
     user_id: int = get_jwt_identity()
@@ -464,14 +963,14 @@ def invite_user_to_collaborate() -> jsonify:
     bucket = helpers.get_bucket(bucket_id)
 
     if bucket is None:
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="bucket not found", success=False, status="Not Found"
             )
         )
 
     if not helpers.is_user_authorized(bucket, user_id):
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="user not authorized", success=False, status="Unauthorized"
             )
@@ -479,27 +978,29 @@ def invite_user_to_collaborate() -> jsonify:
 
     response = helpers.create_bucket_link(bucket_id)
 
-    return jsonify(response)
+    return schemas.respond(response, schemas.InviteOut)
 
 
-@app.post("/users/buckets/link")
-@jwt_required()
+@bp.post("/users/buckets/link")
+@batch.jwt_required_once
+@schemas.body(schemas.LinkBody)
 @helpers.performance_timer
-def link_additional_users_to_bucket() -> jsonify:
+def link_additional_users_to_bucket(body: schemas.LinkBody) -> Response:
     """Verifies invite code and adds user to auth users for bucket"""
 
-    data = request.get_json()
-
-    response = helpers.verify_and_link_users(data)
+    response = helpers.verify_and_link_users(body)
 
     if not response:
-        return jsonify(
+        return schemas.respond(
             helpers.create_response(
                 message="invalid credentials", success=False, status="Unauthorized"
             )
         )
 
-    return jsonify(response)
+    if not response["success"]:
+        return schemas.respond(response)
+
+    return schemas.respond(response, schemas.BucketLinkedOut)
 
 
 ########################################################
@@ -508,12 +1009,34 @@ def link_additional_users_to_bucket() -> jsonify:
 
 # TODO: consider url params for public bucket id/easier for sharing
 # TODO: could add usernames to anon users via cookies/session/local storage
-@app.post("/public/buckets")
+@bp.post("/public/buckets")
+@rate_limit.limit("public_buckets", per_second=0.2, burst=5)
+@idempotency.idempotent
+@schemas.body(schemas.NewBucketBody)
 @helpers.performance_timer
-def add_new_public_bucket() -> jsonify:
+def add_new_public_bucket(body: schemas.NewBucketBody) -> Response:
     """Adds a new bucket and returns JSON"""
 
-    data = request.get_json()
-    response = helpers.add_public_bucket(data)
+    response = helpers.add_public_bucket(body)
+
+    return schemas.respond(response, schemas.BucketCreatedOut)
+
+
+########################################################
+###-----------------------------------------ADMIN ROUTES
+
+
+@bp.get("/admin/cache/stats")
+def get_cache_stats() -> Response:
+    """Returns hit/miss counts and hit ratio for each cached endpoint"""
+
+    token = request.headers.get("X-Admin-Token", "")
+
+    if not hmac.compare_digest(token, current_app.config["ADMIN_TOKEN"]):
+        return schemas.respond(
+            helpers.create_response(
+                message="invalid credentials", success=False, status="Unauthorized"
+            )
+        )
 
-    return jsonify(response)
+    return schemas.respond(cache.get_stats(), schemas.CacheStatsOut)
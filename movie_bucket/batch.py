@@ -0,0 +1,170 @@
+"""Runs the sub-requests of a batch against the app's own routes.
+
+Sub-requests are dispatched one after another in nested request contexts
+that share the batch's app context, so they share its DB session, identity
+map and g. They carry the identity the batch verified rather than its
+credentials, see jwt_required_once. With parallel, each run of consecutive
+read_only views is dispatched concurrently instead, every one on its own
+app context and session.
+"""
+
+import msgspec
+import functools
+
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, g, request
+from flask_jwt_extended import verify_jwt_in_request
+from typing import Dict, List
+from werkzeug.exceptions import HTTPException
+
+from helpers import create_response
+from models import db
+from movie_bucket.schemas import SubRequest
+
+BATCH_MAX_REQUESTS = 20
+BATCH_MAX_WORKERS = 4
+
+# what verify_jwt_in_request leaves on g, copied into each sub-request
+JWT_CONTEXT = (
+    "_jwt_extended_jwt",
+    "_jwt_extended_jwt_header",
+    "_jwt_extended_jwt_user",
+    "_jwt_extended_jwt_location",
+)
+
+# streams, uploads and nested batches can't be answered inline
+EXCLUDED_ENDPOINTS = {
+    "movie_bucket.run_batch",
+    "movie_bucket.export_bucket",
+    "movie_bucket.import_movies_to_bucket",
+    "movie_bucket.stream_bucket_events",
+}
+
+
+def run(sub_requests: List[SubRequest], parallel: bool = False) -> List[Dict]:
+    """Status and body of each sub-request, in order"""
+
+    app = current_app._get_current_object()
+    identity = {name: g.get(name) for name in JWT_CONTEXT}
+
+    responses = []
+    index = 0
+
+    while index < len(sub_requests):
+        end = index + 1
+
+        if parallel and _is_read(app, sub_requests[index]):
+            while end < len(sub_requests) and _is_read(app, sub_requests[end]):
+                end += 1
+
+        if end - index > 1:
+            with ThreadPoolExecutor(min(BATCH_MAX_WORKERS, end - index)) as pool:
+                responses.extend(
+                    pool.map(
+                        lambda sub: _dispatch_isolated(app, sub, identity),
+                        sub_requests[index:end],
+                    )
+                )
+        else:
+            responses.append(_dispatch(app, sub_requests[index], identity))
+
+        index = end
+
+    return responses
+
+
+def jwt_required_once(view):
+    """jwt_required that trusts the identity its batch already verified.
+
+    Use it instead of jwt_required on routes, so a batch decodes the
+    caller's token once rather than once per sub-request.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not has_identity():
+            verify_jwt_in_request()
+
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def has_identity() -> bool:
+    """Whether the request is a sub-request given its batch's identity"""
+
+    return g.get("batch_identity", False)
+
+
+def _is_read(app, sub: SubRequest) -> bool:
+    """Whether the sub-request's view is marked read_only, only those are
+    safe to run concurrently. Some GETs write, e.g. the invite route"""
+
+    try:
+        endpoint, _ = app.url_map.bind("").match(sub.path, sub.method.upper())
+    except HTTPException:
+        return False
+
+    view = app.view_functions.get(endpoint)
+
+    return getattr(view, "read_only", False)
+
+
+def _dispatch_isolated(app, sub: SubRequest, identity: Dict) -> Dict:
+    """Dispatch on a fresh app context and session, for worker threads"""
+
+    with app.app_context():
+        return _dispatch(app, sub, identity)
+
+
+def _dispatch(app, sub: SubRequest, identity: Dict) -> Dict:
+    """Run one sub-request through the full dispatch, hooks included"""
+
+    with app.test_request_context(
+        sub.path,
+        method=sub.method.upper(),
+        query_string=sub.params or None,
+        json=sub.body,
+    ):
+        rule = request.url_rule
+
+        if rule is not None and rule.endpoint in EXCLUDED_ENDPOINTS:
+            return {
+                "status": 400,
+                "body": create_response(
+                    message="route not allowed in a batch",
+                    success=False,
+                    status="Bad Request",
+                ),
+            }
+
+        for name, value in identity.items():
+            setattr(g, name, value)
+
+        g.batch_identity = True
+
+        # a read_only sub-request must not send the next one to a replica
+        g.use_replica = False
+
+        try:
+            response = app.full_dispatch_request()
+
+        except Exception:
+            db.session.rollback()
+            app.logger.exception("batch %s %s failed", sub.method, sub.path)
+
+            return {
+                "status": 500,
+                "body": create_response(
+                    message="internal error",
+                    success=False,
+                    status="Internal Server Error",
+                ),
+            }
+
+        if response.is_json:
+            body = msgspec.Raw(response.get_data())
+        else:
+            body = response.get_data(as_text=True)
+
+    return {"status": response.status_code, "body": body}
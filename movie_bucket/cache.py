@@ -0,0 +1,188 @@
+"""Shared Redis response cache for read endpoints.
+
+Every cached key has a generation counter. Values are stored alongside the
+generation they were computed under, and a write bumps the generation once
+its transaction commits, so a reader that raced the write can never store
+a stale value that outlives the invalidation.
+"""
+
+import json
+import time
+
+from flask import current_app
+from redis.exceptions import RedisError
+from sqlalchemy import event
+
+from models import db
+from movie_bucket import db_routing
+from movie_bucket.redis_client import get_redis
+
+CACHE_TTL_SECONDS = 300
+GENERATION_TTL_SECONDS = 86400
+LOCK_TTL_SECONDS = 10
+LOCK_WAIT_SECONDS = 2
+LOCK_POLL_SECONDS = 0.05
+STATS_KEY = "cache:stats"
+
+_PENDING_KEY = "pending_cache_invalidations"
+
+
+def bucket_key(bucket_id: int, name: str) -> str:
+    """Cache key for data scoped to a bucket"""
+
+    return f"bucket:{bucket_id}:{name}"
+
+
+def user_key(user_id: int, name: str) -> str:
+    """Cache key for data scoped to a user"""
+
+    return f"user:{user_id}:{name}"
+
+
+########################################################
+###----------------------------------------------READING
+
+
+def fetch(key: str, compute, variant: str = ""):
+    """Return the cached value for key, computing and storing it on a miss.
+
+    Only one worker recomputes a missing value, reading from the primary;
+    the others wait briefly for it to appear. Values of None are never
+    cached. Falls back to compute() if Redis is unavailable.
+    """
+
+    generation_key = f"cache:gen:{key}"
+    value_key = f"cache:{key}:{variant}"
+    lock_key = f"{value_key}:lock"
+    stat = _stat_name(key)
+
+    try:
+        redis = get_redis()
+        generation, value = _read(redis, generation_key, value_key)
+
+        if value is not None:
+            _record(redis, stat, "hits")
+            return value
+
+        _record(redis, stat, "misses")
+
+        if not redis.set(lock_key, 1, nx=True, ex=LOCK_TTL_SECONDS):
+            deadline = time.monotonic() + LOCK_WAIT_SECONDS
+
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_SECONDS)
+                generation, value = _read(redis, generation_key, value_key)
+
+                if value is not None:
+                    return value
+
+            return compute()
+
+        try:
+            # a lagging replica would cache stale data under a fresh generation
+            with db_routing.use_primary():
+                value = compute()
+
+            if value is not None:
+                redis.set(
+                    value_key,
+                    f"{generation}:{json.dumps(value)}",
+                    ex=CACHE_TTL_SECONDS,
+                )
+
+        finally:
+            redis.delete(lock_key)
+
+        return value
+
+    except RedisError as err:
+        current_app.logger.warning("response cache unavailable: %s", err)
+        return compute()
+
+
+def get_stats() -> dict:
+    """Hit/miss counts and hit ratio per cached endpoint, empty while Redis
+    is unreachable"""
+
+    try:
+        raw = get_redis().hgetall(STATS_KEY)
+    except RedisError as err:
+        current_app.logger.warning("failed to read cache stats: %s", err)
+        return {}
+
+    stats = {}
+    for field, count in raw.items():
+        stat, outcome = field.decode().rsplit(":", 1)
+        stats.setdefault(stat, {"hits": 0, "misses": 0})[outcome] = int(count)
+
+    for counts in stats.values():
+        total = counts["hits"] + counts["misses"]
+        counts["hit_ratio"] = counts["hits"] / total if total else 0.0
+
+    return stats
+
+
+def _read(redis, generation_key, value_key):
+    """Return the current generation and the value if it is still current"""
+
+    generation, raw = redis.mget(generation_key, value_key)
+    generation = int(generation or 0)
+
+    if raw is None:
+        return generation, None
+
+    stored_generation, payload = raw.split(b":", 1)
+    if int(stored_generation) != generation:
+        return generation, None
+
+    return generation, json.loads(payload)
+
+
+def _record(redis, stat, outcome):
+    """Count a hit or miss"""
+
+    redis.hincrby(STATS_KEY, f"{stat}:{outcome}", 1)
+
+
+def _stat_name(key):
+    """bucket:12:movies -> bucket_movies"""
+
+    scope, _, name = key.split(":", 2)
+    return f"{scope}_{name}"
+
+
+########################################################
+###-----------------------------------------INVALIDATION
+
+
+def invalidate_on_commit(*keys: str):
+    """Invalidate keys once the current transaction commits"""
+
+    db.session.info.setdefault(_PENDING_KEY, set()).update(keys)
+
+
+@event.listens_for(db.session, "after_commit")
+def invalidate_committed_keys(session):
+    """Bump the generation of every key written in this transaction"""
+
+    keys = session.info.pop(_PENDING_KEY, None)
+    if not keys:
+        return
+
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key in keys:
+            pipe.incr(f"cache:gen:{key}")
+            pipe.expire(f"cache:gen:{key}", GENERATION_TTL_SECONDS)
+        pipe.execute()
+
+    except RedisError as err:
+        # stale entries still expire after CACHE_TTL_SECONDS
+        current_app.logger.warning("failed to invalidate cache keys: %s", err)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def discard_rolled_back_keys(session, previous_transaction):
+    """Nothing changed, nothing to invalidate"""
+
+    session.info.pop(_PENDING_KEY, None)
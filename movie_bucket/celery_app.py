@@ -0,0 +1,57 @@
+"""Slim Celery entry point.
+
+Workers and the web app both import the Celery app from here, so a worker
+never imports the web app. The Flask app a task runs in is built on first
+use with only config and the database.
+"""
+
+import os
+
+from celery import Celery, Task
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REDIS_URL = os.environ.get("REDIS_URL", "redis://localhost")
+
+_worker_app = None
+
+
+def get_worker_app():
+    """Minimal Flask app for running tasks, built once per process"""
+
+    global _worker_app
+
+    if _worker_app is None:
+        from flask import Flask
+        from models import db
+        from movie_bucket import db_routing
+        from movie_bucket.config import configure_app
+
+        # registers the listeners publishing committed changes to Redis
+        from movie_bucket import change_feed  # noqa: F401
+
+        app = Flask("movie_bucket")
+        configure_app(app)
+        db_routing.configure_engines(app)
+        db.init_app(app)
+
+        _worker_app = app
+
+    return _worker_app
+
+
+class FlaskTask(Task):
+    """Runs every task inside an app context"""
+
+    def __call__(self, *args, **kwargs):
+        with get_worker_app().app_context():
+            return self.run(*args, **kwargs)
+
+
+celery = Celery(
+    'movie_bucket',
+    broker=REDIS_URL,
+    backend=REDIS_URL,
+    task_cls=FlaskTask,
+)
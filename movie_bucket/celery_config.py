@@ -1,20 +1,52 @@
 from celery.schedules import crontab
-from movie_bucket.app import celery
+from movie_bucket.celery_app import celery
 
 #this needs to be imported for celery to run, despite the 'unused' error
-from movie_bucket.tasks import clean_up_expired_links
+from movie_bucket.tasks import (
+    clean_up_expired_links,
+    compact_bucket_changes,
+    import_watchlist,
+    enrich_movie_details,
+    refresh_recommendations,
+    refresh_trending,
+    purge_bucket,
+    purge_deleted_buckets,
+)
 
 celery.conf.beat_schedule = {
     'clean_up_expired_links': {
         'task': 'movie_bucket.tasks.clean_up_expired_links',
         'schedule': crontab(hour=0, minute=0),
     },
+    'compact_bucket_changes': {
+        'task': 'movie_bucket.tasks.compact_bucket_changes',
+        'schedule': crontab(minute=0),
+    },
+    'enrich_movie_details': {
+        'task': 'movie_bucket.tasks.enrich_movie_details',
+        'schedule': crontab(minute='*/15'),
+    },
+    'refresh_recommendations': {
+        'task': 'movie_bucket.tasks.refresh_recommendations',
+        'schedule': crontab(minute=30),
+    },
+    'rebuild_recommendations': {
+        'task': 'movie_bucket.tasks.refresh_recommendations',
+        'schedule': crontab(hour=3, minute=0),
+        'kwargs': {'full': True},
+    },
+    'refresh_trending': {
+        'task': 'movie_bucket.tasks.refresh_trending',
+        'schedule': crontab(minute='*/10'),
+    },
+    'purge_deleted_buckets': {
+        'task': 'movie_bucket.tasks.purge_deleted_buckets',
+        'schedule': crontab(minute=45),
+    },
 }
 
 # crontab(hour=0, minute=0)
 # crontab(minute='*/2')
 
-# # If I decide to update where the backend results are stored, this is the conf
-# celery.conf.update(
-#     result_backend='redis://localhost:6379/0'
-# )
+# results backend is configured with the celery app, task progress is
+# polled from the web process
@@ -0,0 +1,177 @@
+"""Sequences bucket changes at commit, publishes them to Redis pub/sub and
+streams them as SSE."""
+
+import json
+
+from flask import current_app
+from redis.exceptions import RedisError
+from sqlalchemy import event, update
+
+from models import db, BucketChange, ChangeFeedPosition
+from movie_bucket.redis_client import get_redis
+
+HEARTBEAT_SECONDS = 15
+RECONNECT_MILLISECONDS = 3000
+REPLAY_LIMIT = 500
+
+_PENDING_KEY = "pending_bucket_changes"
+
+
+def channel_for(bucket_id: int) -> str:
+    """Name of the pub/sub channel carrying a bucket's changes"""
+
+    return f"bucket:{bucket_id}:changes"
+
+
+########################################################
+###-------------------------------------------PUBLISHING
+
+
+@event.listens_for(db.session, "after_flush")
+def collect_flushed_changes(session, flush_context):
+    """Hold on to change log rows written in this transaction"""
+
+    for obj in session.new:
+        if isinstance(obj, BucketChange):
+            session.info.setdefault(_PENDING_KEY, []).append(obj.serialize())
+
+
+@event.listens_for(db.session, "before_commit")
+def sequence_pending_changes(session):
+    """Give this transaction's changes seqs above every committed change.
+
+    The position row stays locked until the commit, so transactions take
+    their seqs in commit order and a reader that has seen a seq has seen
+    every change below it. seq is id plus an offset, which leaves gaps
+    where other transactions' ids interleave but needs one UPDATE.
+    """
+
+    session.flush()
+
+    changes = session.info.get(_PENDING_KEY)
+    if not changes:
+        return
+
+    ids = [change["id"] for change in changes]
+    span = max(ids) - min(ids) + 1
+
+    position = session.execute(
+        update(ChangeFeedPosition)
+        .where(ChangeFeedPosition.id == 1)
+        .values(position=ChangeFeedPosition.position + span)
+        .returning(ChangeFeedPosition.position)
+    ).scalar_one()
+
+    offset = position - span + 1 - min(ids)
+
+    session.execute(
+        update(BucketChange)
+        .where(BucketChange.id.in_(ids))
+        .values(seq=BucketChange.id + offset)
+        .execution_options(synchronize_session=False)
+    )
+
+    for change in changes:
+        change["seq"] = change["id"] + offset
+
+
+@event.listens_for(db.session, "after_commit")
+def publish_committed_changes(session):
+    """Publish changes only once they are durable"""
+
+    changes = session.info.pop(_PENDING_KEY, None)
+    if not changes:
+        return
+
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for change in changes:
+            pipe.publish(channel_for(change["bucket_id"]), json.dumps(change))
+        pipe.execute()
+
+    except RedisError as err:
+        # subscribers recover missed events from the change log on reconnect
+        current_app.logger.warning("failed to publish bucket changes: %s", err)
+
+
+@event.listens_for(db.session, "after_soft_rollback")
+def discard_rolled_back_changes(session, previous_transaction):
+    """Drop changes that never made it to the database"""
+
+    session.info.pop(_PENDING_KEY, None)
+
+
+########################################################
+###--------------------------------------------STREAMING
+
+
+def stream_changes(bucket_id: int, last_event_id: int = None):
+    """Subscribe to a bucket's changes and return an SSE generator.
+
+    Subscribes before reading the backlog so nothing committed in between
+    is lost; live changes that were already replayed are dropped.
+    """
+
+    pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(channel_for(bucket_id))
+
+    backlog = []
+    if last_event_id is not None:
+        backlog = [
+            change.serialize()
+            for change in BucketChange.query.filter(
+                BucketChange.bucket_id == bucket_id,
+                BucketChange.id > last_event_id,
+            )
+            .order_by(BucketChange.id)
+            .limit(REPLAY_LIMIT + 1)
+        ]
+
+    # don't hold a pooled connection for the lifetime of the stream
+    db.session.close()
+
+    return _event_stream(pubsub, backlog)
+
+
+def _event_stream(pubsub, backlog):
+    """Yield SSE frames: the replayed backlog, then live changes.
+
+    Ids are assigned at insert but published at commit, so live changes can
+    arrive out of id order. Only ids replayed from the backlog are skipped.
+    """
+
+    try:
+        yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+
+        if len(backlog) > REPLAY_LIMIT:
+            # too far behind to replay, client should refetch the bucket
+            yield "event: reset\ndata: {}\n\n"
+            backlog = []
+
+        replayed = {change["id"] for change in backlog}
+
+        for change in backlog:
+            yield _format_event(change)
+
+        while True:
+            message = pubsub.get_message(timeout=HEARTBEAT_SECONDS)
+
+            if message is None:
+                yield ": heartbeat\n\n"
+                continue
+
+            change = json.loads(message["data"])
+
+            if change["id"] in replayed:
+                continue
+
+            yield _format_event(change)
+
+    finally:
+        pubsub.close()
+
+
+def _format_event(change):
+    """Build an SSE frame for a change"""
+
+    return f"id: {change['id']}\nevent: change\ndata: {json.dumps(change)}\n\n"
@@ -0,0 +1,23 @@
+"""Configuration shared by the web app and Celery workers."""
+
+import os
+
+from dotenv import load_dotenv
+
+from movie_bucket.tmdb import BASE_API_URL
+
+
+def configure_app(app):
+    """Read settings every process needs from the environment"""
+
+    load_dotenv()
+
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ["DATABASE_URL"]
+    app.config["SQLALCHEMY_ECHO"] = False
+    app.config["AUTH_KEY"] = os.environ["AUTH_KEY"]
+    app.config["TMDB_BASE_URL"] = os.environ.get("TMDB_BASE_URL", BASE_API_URL)
+    app.config["TMDB_TRANSPORT"] = os.environ.get("TMDB_TRANSPORT", "live")
+    app.config["TMDB_CASSETTE_DIR"] = os.environ.get(
+        "TMDB_CASSETTE_DIR", os.path.join("benchmarks", "cassettes")
+    )
+    app.config["REDIS_URL"] = os.environ.get("REDIS_URL", "redis://localhost")
@@ -0,0 +1,156 @@
+"""Routes read-only requests to replica databases.
+
+Replicas are configured as SQLAlchemy binds named replica_<n>. Views marked
+read_only query a replica, picked once per request, unless the caller wrote
+recently, in which case they stay on the primary for REPLICA_STICKY_SECONDS
+so they always see their own writes. Flushes always go to the primary.
+"""
+
+import os
+import random
+import functools
+
+from contextlib import contextmanager
+from flask import current_app, g, has_app_context
+from flask_jwt_extended import get_jwt_identity
+from flask_sqlalchemy.session import Session
+from redis.exceptions import RedisError
+from sqlalchemy import event
+
+from movie_bucket.redis_client import get_redis
+
+REPLICA_BIND_PREFIX = "replica_"
+REPLICA_STICKY_SECONDS = 5
+
+STICKY_KEY = "replica:sticky:user:{}"
+
+
+class RoutingSession(Session):
+    """Session that sends reads to a replica while the request allows it"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and _replica_allowed():
+            # one replica per request, so its reads see a single snapshot
+            # and the list isn't rebuilt for every statement
+            if "replica_bind" not in g:
+                replicas = [
+                    engine
+                    for key, engine in self._db.engines.items()
+                    if key and key.startswith(REPLICA_BIND_PREFIX)
+                ]
+                g.replica_bind = random.choice(replicas) if replicas else None
+
+            if g.replica_bind is not None:
+                return g.replica_bind
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _replica_allowed():
+    return has_app_context() and g.get("use_replica", False)
+
+
+@event.listens_for(RoutingSession, "after_flush")
+def note_write(session, flush_context):
+    """Remember the request wrote, see mark_write"""
+
+    if has_app_context():
+        g.db_wrote = True
+
+
+########################################################
+###-----------------------------------------------CONFIG
+
+
+def configure_engines(app):
+    """Set pool options for the primary and a bind per replica from env"""
+
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", 5)),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", 10)),
+        "pool_pre_ping": os.environ.get("DB_POOL_PRE_PING", "true") == "true",
+    }
+
+    replica_urls = [
+        url.strip()
+        for url in os.environ.get("REPLICA_DATABASE_URLS", "").split(",")
+        if url.strip()
+    ]
+
+    app.config["SQLALCHEMY_BINDS"] = {
+        f"{REPLICA_BIND_PREFIX}{index}": {
+            "url": url,
+            "pool_size": int(os.environ.get("REPLICA_POOL_SIZE", 5)),
+            "max_overflow": int(os.environ.get("REPLICA_MAX_OVERFLOW", 10)),
+            "pool_pre_ping": os.environ.get("REPLICA_POOL_PRE_PING", "true")
+            == "true",
+        }
+        for index, url in enumerate(replica_urls)
+    }
+
+
+########################################################
+###----------------------------------------------ROUTING
+
+
+def read_only(view):
+    """Serve a view from a replica unless its caller wrote recently.
+
+    Goes below jwt_required so the caller's identity is known; callers
+    without one are served from a replica. Marks the view read_only, which
+    functools.wraps carries up through the decorators above it.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.use_replica = not _wrote_recently(current_identity())
+        return view(*args, **kwargs)
+
+    wrapper.read_only = True
+
+    return wrapper
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside the block, e.g. when filling a cache"""
+
+    previous = g.get("use_replica", False)
+    g.use_replica = False
+
+    try:
+        yield
+    finally:
+        g.use_replica = previous
+
+
+def mark_write(user_id):
+    """Keep the user's reads on the primary while replicas catch up"""
+
+    if user_id is None:
+        return
+
+    try:
+        get_redis().set(STICKY_KEY.format(user_id), 1, ex=REPLICA_STICKY_SECONDS)
+    except RedisError as err:
+        current_app.logger.warning("failed to mark write for %s: %s", user_id, err)
+
+
+def _wrote_recently(user_id):
+    if user_id is None:
+        return False
+
+    try:
+        return bool(get_redis().exists(STICKY_KEY.format(user_id)))
+    except RedisError:
+        # can't tell, so play safe
+        return True
+
+
+def current_identity():
+    """JWT identity of the request, None if the route didn't verify one"""
+
+    try:
+        return get_jwt_identity()
+    except RuntimeError:
+        return None
@@ -0,0 +1,149 @@
+"""Fills in missing movie details from TMDB in the background."""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from flask import current_app
+from redis.exceptions import RedisError
+from requests.exceptions import RequestException
+from sqlalchemy import or_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, List
+
+from helpers import record_change, parse_release_date
+from models import db, Movie, Buckets_Movies
+from movie_bucket import cache, tmdb
+from movie_bucket.redis_client import get_redis
+
+ENRICHMENT_BATCH_SIZE = 100
+ENRICHMENT_WORKERS = 8
+
+# at the shared 20 rps TMDB budget a full run takes about 8 minutes, well
+# inside the 15 minute schedule
+ENRICHMENT_MAX_PER_RUN = 10000
+RUN_LOCK_KEY = "enrichment:run:lock"
+RUN_LOCK_TTL_SECONDS = 1800
+
+DETAIL_FIELDS = ["image", "release_date", "runtime", "genre", "bio"]
+
+
+def needs_details(movie: Dict) -> bool:
+    """Whether a serialized movie is missing details TMDB could provide"""
+
+    return "runtime" not in movie or "genre" not in movie
+
+
+def find_movies_missing_details(
+    movie_ids: List[int] = None, limit: int = ENRICHMENT_MAX_PER_RUN
+) -> List[int]:
+    """Ids of up to limit movies never looked up on TMDB that lack runtime
+    or genre"""
+
+    query = db.session.query(Movie.id).filter(
+        Movie.details_synced_at.is_(None),
+        or_(Movie.runtime.is_(None), Movie.genre.is_(None)),
+    )
+
+    if movie_ids is not None:
+        query = query.filter(Movie.id.in_(movie_ids))
+
+    return [movie_id for (movie_id,) in query.order_by(Movie.id).limit(limit)]
+
+
+def claim_run() -> bool:
+    """Claim the sweep over every movie missing details, False if another
+    run holds it. Runs anyway if Redis is unavailable."""
+
+    try:
+        return bool(
+            get_redis().set(RUN_LOCK_KEY, 1, nx=True, ex=RUN_LOCK_TTL_SECONDS)
+        )
+    except RedisError as err:
+        current_app.logger.warning("enrichment run lock unavailable: %s", err)
+        return True
+
+
+def release_run():
+    """Let the next sweep run"""
+
+    try:
+        get_redis().delete(RUN_LOCK_KEY)
+    except RedisError as err:
+        current_app.logger.warning("failed to release enrichment run: %s", err)
+
+
+def enrich_movies(movie_ids: List[int]) -> int:
+    """Fetches details for up to a batch of movies concurrently and
+    bulk-updates the missing fields. Returns the number of movies updated."""
+
+    app = current_app._get_current_object()
+
+    def fetch(movie_id):
+        with app.app_context():
+            tmdb.background_limiter.wait()
+
+            try:
+                return movie_id, tmdb.get_movie_details(movie_id)
+            except RequestException as err:
+                # left unsynced, the next periodic run retries it
+                app.logger.warning("TMDB details for %s failed: %s", movie_id, err)
+                return movie_id, False
+
+    with ThreadPoolExecutor(max_workers=ENRICHMENT_WORKERS) as pool:
+        fetched = dict(pool.map(fetch, movie_ids[:ENRICHMENT_BATCH_SIZE]))
+
+    answered_ids = [
+        movie_id for movie_id, details in fetched.items() if details is not False
+    ]
+    movies = Movie.query.filter(Movie.id.in_(answered_ids)).all()
+
+    bucket_ids = {}
+    for bucket_id, movie_id in db.session.query(
+        Buckets_Movies.bucket_id, Buckets_Movies.movie_id
+    ).filter(Buckets_Movies.movie_id.in_([movie.id for movie in movies])):
+        bucket_ids.setdefault(movie_id, []).append(bucket_id)
+
+    synced_at = datetime.now()
+    updates = []
+    updated = 0
+
+    for movie in movies:
+        details = fetched[movie.id] or {}
+
+        if details.get("release_date"):
+            details["release_date"] = parse_release_date(details["release_date"])
+
+        # never overwrite what the client sent
+        changes = {
+            field: details[field]
+            for field in DETAIL_FIELDS
+            if details.get(field) is not None and getattr(movie, field) is None
+        }
+
+        updates.append({"id": movie.id, "details_synced_at": synced_at, **changes})
+
+        if not changes:
+            continue
+
+        updated += 1
+
+        # reflect the bulk update in the loaded instance for serialization
+        for field, value in changes.items():
+            set_committed_value(movie, field, value)
+
+        for bucket_id in bucket_ids.get(movie.id, []):
+            record_change(bucket_id, "movie", movie.id, "upsert", movie.serialize())
+            cache.invalidate_on_commit(cache.bucket_key(bucket_id, "movies"))
+
+    try:
+        db.session.bulk_update_mappings(Movie, updates)
+        db.session.commit()
+
+    except IntegrityError as err:
+        db.session.rollback()
+
+        error_message = err.orig.diag.message_detail
+
+        raise err(error_message)
+
+    return updated
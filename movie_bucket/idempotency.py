@@ -0,0 +1,157 @@
+"""Idempotency-Key support for write endpoints.
+
+The first request with a given key runs the view and its response is kept
+in Redis for IDEMPOTENCY_TTL_SECONDS; retries with the same key get that
+response back without running the view again. While the first request is
+still running, the key holds an in-flight marker, so a concurrent retry is
+told to try again instead of executing the write a second time.
+
+Keys are scoped per endpoint and caller, and tied to a hash of the body:
+reusing a key for a different request is refused.
+"""
+
+import json
+import hashlib
+import functools
+
+from flask import current_app, request
+from redis.exceptions import RedisError
+
+from helpers import create_response
+from movie_bucket import db_routing, schemas
+from movie_bucket.redis_client import get_redis
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_TTL_SECONDS = 86400
+IN_FLIGHT_TTL_SECONDS = 30
+MAX_KEY_LENGTH = 255
+
+KEY_FORMAT = "idempotency:{endpoint}:{identity}:{key}"
+
+
+def idempotent(view):
+    """Replay the stored response for retried Idempotency-Keys.
+
+    Goes below jwt_required so keys are scoped to the caller.
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+
+        if key is None:
+            return view(*args, **kwargs)
+
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return schemas.respond(
+                create_response(
+                    message="invalid Idempotency-Key",
+                    success=False,
+                    status="Bad Request",
+                )
+            )
+
+        redis_key = KEY_FORMAT.format(
+            endpoint=request.endpoint,
+            identity=db_routing.current_identity() or "anonymous",
+            key=key,
+        )
+        fingerprint = hashlib.sha256(request.get_data()).hexdigest()
+        in_flight = json.dumps({"state": "in_flight", "fingerprint": fingerprint})
+
+        try:
+            redis = get_redis()
+            claimed = redis.set(
+                redis_key, in_flight, nx=True, ex=IN_FLIGHT_TTL_SECONDS
+            )
+
+            if not claimed:
+                stored = redis.get(redis_key)
+
+                # expired between the two calls, run it as a first request
+                if stored is None:
+                    claimed = redis.set(
+                        redis_key, in_flight, nx=True, ex=IN_FLIGHT_TTL_SECONDS
+                    )
+                else:
+                    return _replay(json.loads(stored), fingerprint)
+
+        except RedisError as err:
+            current_app.logger.warning("idempotency keys unavailable: %s", err)
+            return view(*args, **kwargs)
+
+        if not claimed:
+            return _in_flight_response()
+
+        try:
+            response = current_app.make_response(view(*args, **kwargs))
+
+        except Exception:
+            _forget(redis, redis_key)
+            raise
+
+        if response.status_code >= 500 or response.is_streamed:
+            _forget(redis, redis_key)
+            return response
+
+        record = {
+            "state": "done",
+            "fingerprint": fingerprint,
+            "status": response.status_code,
+            "mimetype": response.mimetype,
+            "body": response.get_data(as_text=True),
+        }
+
+        try:
+            redis.set(redis_key, json.dumps(record), ex=IDEMPOTENCY_TTL_SECONDS)
+        except RedisError as err:
+            current_app.logger.warning("failed to store idempotent response: %s", err)
+
+        return response
+
+    return wrapper
+
+
+def _replay(record, fingerprint):
+    """Stored response for a retry, or why there isn't one"""
+
+    if record["fingerprint"] != fingerprint:
+        return schemas.respond(
+            create_response(
+                message="Idempotency-Key was used for a different request",
+                success=False,
+                status="Unprocessable Entity",
+            )
+        )
+
+    if record["state"] != "done":
+        return _in_flight_response()
+
+    response = current_app.response_class(
+        record["body"], status=record["status"], mimetype=record["mimetype"]
+    )
+    response.headers["Idempotent-Replayed"] = "true"
+
+    return response
+
+
+def _in_flight_response():
+    response = schemas.respond(
+        create_response(
+            message="a request with this Idempotency-Key is in progress",
+            success=False,
+            status="Conflict",
+        )
+    )
+    response.headers["Retry-After"] = "1"
+
+    return response
+
+
+def _forget(redis, redis_key):
+    """Drop the in-flight marker so the request can be retried"""
+
+    try:
+        redis.delete(redis_key)
+    except RedisError as err:
+        current_app.logger.warning("failed to release idempotency key: %s", err)
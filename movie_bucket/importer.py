@@ -0,0 +1,328 @@
+"""Bulk import of watchlists exported from other services."""
+
+import io
+import csv
+import json
+import uuid
+
+from flask import current_app
+from redis.exceptions import RedisError
+from requests.exceptions import RequestException
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, Iterator, List, Optional
+
+from helpers import record_change, parse_release_date
+from models import db, Movie, Buckets_Movies
+from movie_bucket import cache, tmdb
+from movie_bucket.redis_client import get_redis
+
+IMPORT_BATCH_SIZE = 200
+IMPORT_MAX_BYTES = 10 * 1024 * 1024
+JSON_READ_SIZE = 65536
+
+IMPORT_FORMATS = ["csv", "json"]
+
+# stands in for the movie of a row whose TMDB lookup failed
+LOOKUP_FAILED = object()
+
+# uploads are handed to workers through Redis, they don't share the web
+# hosts' disks
+UPLOAD_KEY = "import:upload:{}"
+UPLOAD_TTL_SECONDS = 86400
+
+
+########################################################
+###----------------------------------------------UPLOADS
+
+
+def save_upload(data: bytes) -> str:
+    """Stores an uploaded file for a worker to import, returns its key"""
+
+    key = UPLOAD_KEY.format(uuid.uuid4().hex)
+    get_redis().set(key, data, ex=UPLOAD_TTL_SECONDS)
+
+    return key
+
+
+def load_upload(key: str) -> Optional[bytes]:
+    """Contents of a stored upload, None once it expired"""
+
+    return get_redis().get(key)
+
+
+def discard_upload(key: str):
+    """Drops a stored upload, it expires anyway if this fails"""
+
+    try:
+        get_redis().delete(key)
+    except RedisError as err:
+        current_app.logger.warning("failed to discard upload %s: %s", key, err)
+
+
+########################################################
+###----------------------------------------------PARSING
+
+
+def iter_rows(data: bytes, file_format: str) -> Iterator[Optional[Dict]]:
+    """Yields normalized rows from an uploaded file without decoding it all
+    at once, None for entries that can't be read as a movie"""
+
+    with io.TextIOWrapper(io.BytesIO(data), encoding="utf-8-sig", newline="") as file:
+        if file_format == "csv":
+            entries = csv.DictReader(file)
+        else:
+            entries = _iter_json_array(file)
+
+        for entry in entries:
+            yield _normalize(entry)
+
+
+def _iter_json_array(file) -> Iterator:
+    """Incrementally decodes the items of a top-level JSON array"""
+
+    decoder = json.JSONDecoder()
+    buffer = ""
+    started = False
+
+    while True:
+        chunk = file.read(JSON_READ_SIZE)
+        buffer += chunk
+
+        while True:
+            buffer = buffer.lstrip()
+
+            if not started:
+                if not buffer:
+                    break
+                if buffer[0] != "[":
+                    raise ValueError("expected a JSON array")
+                buffer = buffer[1:]
+                started = True
+                continue
+
+            if buffer.startswith(","):
+                buffer = buffer[1:]
+                continue
+
+            if buffer.startswith("]"):
+                return
+
+            try:
+                item, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                # item is split across chunks, read more
+                if not chunk:
+                    raise
+                break
+
+            buffer = buffer[end:]
+            yield item
+
+        if not chunk:
+            raise ValueError("unterminated JSON array")
+
+
+def _normalize(entry) -> Optional[Dict]:
+    """Maps a parsed entry onto title/id/year, None if invalid. Watched
+    flags are ignored, is_watched is shared by every bucket holding a movie"""
+
+    if isinstance(entry, str):
+        entry = {"title": entry}
+
+    if not isinstance(entry, dict):
+        return None
+
+    entry = {str(key).strip().lower(): value for key, value in entry.items()}
+
+    title = entry.get("title") or entry.get("name") or ""
+
+    if not isinstance(title, str):
+        return None
+
+    title = title.strip()
+    movie_id = entry.get("tmdb_id") or entry.get("id")
+
+    if not title and not movie_id:
+        return None
+
+    year = entry.get("year") or str(entry.get("release_date") or "")[:4]
+
+    return {
+        "title": title,
+        "id": int(movie_id) if str(movie_id or "").isdigit() else None,
+        "year": str(year) if year else None,
+    }
+
+
+########################################################
+###--------------------------------------------RESOLVING
+
+
+def import_rows(
+    bucket_id: int, rows: Iterator[Optional[Dict]], on_progress=None
+) -> Dict:
+    """Adds movies for the rows to a bucket, one transaction per batch.
+    Invalid (None) rows and rows whose TMDB lookup failed are counted and
+    skipped"""
+
+    counts = {
+        "processed": 0,
+        "added": 0,
+        "duplicates": 0,
+        "not_found": 0,
+        "invalid": 0,
+        "errors": 0,
+    }
+
+    batch = []
+    for row in rows:
+        if row is None:
+            counts["processed"] += 1
+            counts["invalid"] += 1
+            continue
+
+        batch.append(row)
+
+        if len(batch) == IMPORT_BATCH_SIZE:
+            _import_batch(bucket_id, batch, counts)
+            batch = []
+
+            if on_progress:
+                on_progress(counts)
+
+    if batch:
+        _import_batch(bucket_id, batch, counts)
+
+    return counts
+
+
+def _import_batch(bucket_id: int, rows: List[Dict], counts: Dict):
+    """Resolves a batch of rows to movies and links them to the bucket"""
+
+    movies = _resolve_movies(rows)
+
+    existing_ids = {
+        movie_id
+        for (movie_id,) in db.session.query(Buckets_Movies.movie_id).filter(
+            Buckets_Movies.bucket_id == bucket_id,
+            Buckets_Movies.movie_id.in_(
+                [movie.id for movie in movies if isinstance(movie, Movie)]
+            ),
+        )
+    }
+
+    for movie in movies:
+        counts["processed"] += 1
+
+        if movie is LOOKUP_FAILED:
+            counts["errors"] += 1
+            continue
+
+        if movie is None:
+            counts["not_found"] += 1
+            continue
+
+        if movie.id in existing_ids:
+            counts["duplicates"] += 1
+            continue
+
+        existing_ids.add(movie.id)
+        db.session.add(Buckets_Movies(bucket_id=bucket_id, movie_id=movie.id))
+        record_change(bucket_id, "movie", movie.id, "upsert", movie.serialize())
+        counts["added"] += 1
+
+    cache.invalidate_on_commit(cache.bucket_key(bucket_id, "movies"))
+
+    try:
+        db.session.commit()
+
+    except IntegrityError as err:
+        db.session.rollback()
+
+        error_message = err.orig.diag.message_detail
+
+        raise err(error_message)
+
+
+def _resolve_movies(rows: List[Dict]) -> List[Movie]:
+    """Finds a movie for each row in the movies table, falling back to a
+    rate-limited TMDB search. Unresolved rows map to None, rows whose
+    search failed to LOOKUP_FAILED."""
+
+    ids = {row["id"] for row in rows if row["id"]}
+    titles = {row["title"].lower() for row in rows if not row["id"]}
+
+    by_id = {movie.id: movie for movie in Movie.query.filter(Movie.id.in_(ids))}
+
+    by_title = {}
+    for movie in Movie.query.filter(func.lower(Movie.title).in_(titles)):
+        by_title.setdefault(movie.title.lower(), []).append(movie)
+
+    movies = []
+    for row in rows:
+        if row["id"] in by_id:
+            movies.append(by_id[row["id"]])
+            continue
+
+        candidates = by_title.get(row["title"].lower(), [])
+        movie = _pick(candidates, row["year"])
+
+        if movie is None and row["title"]:
+            movie = _search_tmdb(row, by_id)
+
+        if isinstance(movie, Movie):
+            by_id[movie.id] = movie
+            by_title.setdefault(movie.title.lower(), []).insert(0, movie)
+
+        movies.append(movie)
+
+    return movies
+
+
+def _pick(candidates: List[Movie], year: str) -> Movie:
+    """Prefer the candidate released in the given year"""
+
+    for movie in candidates:
+        if year and movie.release_date and str(movie.release_date.year) == year:
+            return movie
+
+    if candidates and not year:
+        return candidates[0]
+
+    return None
+
+
+def _search_tmdb(row: Dict, by_id: Dict):
+    """Looks a title up on TMDB and stages the movie if it is new. A failed
+    lookup only skips its row, earlier batches are already committed"""
+
+    tmdb.background_limiter.wait()
+
+    try:
+        results = tmdb.search_movies(row["title"])
+    except (RequestException, tmdb.CassetteMissing) as err:
+        current_app.logger.warning("TMDB search for %r failed: %s", row["title"], err)
+        return LOOKUP_FAILED
+
+    result = next(
+        (
+            result
+            for result in results
+            if row["year"] and (result["release_date"] or "").startswith(row["year"])
+        ),
+        results[0] if results else None,
+    )
+
+    if result is None:
+        return None
+
+    movie = by_id.get(result["id"]) or db.session.get(Movie, result["id"])
+
+    if movie is None:
+        movie = Movie(
+            **{**result, "release_date": parse_release_date(result["release_date"])}
+        )
+        db.session.add(movie)
+
+    return movie
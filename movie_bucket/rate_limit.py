@@ -0,0 +1,175 @@
+"""Token-bucket rate limiting per route and client.
+
+Each limited route has a name, a refill rate and a burst size, overridable
+through the RATE_LIMITS config; RATE_LIMIT_ENABLED=false turns limiting
+off, e.g. for load tests. Clients are the JWT identity when there is
+one, otherwise the remote address. Buckets live in process memory by
+default; RATE_LIMIT_BACKEND=redis keeps them in Redis, updated atomically
+by a Lua script, so the limit holds across workers. If Redis is
+unavailable the in-process buckets take over.
+"""
+
+import math
+import time
+import functools
+import threading
+
+from flask import current_app, request
+from redis.exceptions import RedisError
+from typing import Dict, Tuple
+
+from helpers import create_response
+from movie_bucket import db_routing, schemas
+from movie_bucket.redis_client import get_redis
+
+MAX_TRACKED_KEYS = 10000
+
+KEY_FORMAT = "ratelimit:{name}:{client}"
+
+# KEYS[1] bucket; ARGV rate per second, burst. Returns seconds to wait
+# as a string, "0" when the request may go ahead.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+
+tokens = math.min(burst, tokens + (now - updated) * rate)
+
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+
+return tostring(wait)
+"""
+
+
+class TokenBucket:
+    """In-process token buckets keyed by client, for one limit. Safe to
+    share between threads."""
+
+    def __init__(self):
+        self.buckets: Dict[str, Tuple[float, float]] = {}
+        self.lock = threading.Lock()
+
+    def acquire(self, key: str, rate: float, burst: int) -> float:
+        """Take a token; seconds until one is available if there is none"""
+
+        now = time.monotonic()
+
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now)
+                wait = 0.0
+            else:
+                self.buckets[key] = (tokens, now)
+                wait = (1 - tokens) / rate
+
+            if len(self.buckets) > MAX_TRACKED_KEYS:
+                self._prune(now, rate, burst)
+
+        return wait
+
+    def _prune(self, now: float, rate: float, burst: int):
+        """Forget buckets that have had time to refill completely"""
+
+        idle = burst / rate
+        self.buckets = {
+            key: state
+            for key, state in self.buckets.items()
+            if now - state[1] < idle
+        }
+
+
+class RedisTokenBucket:
+    """Token buckets in Redis, shared by every worker"""
+
+    def __init__(self, redis):
+        self.script = redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def acquire(self, key: str, rate: float, burst: int) -> float:
+        return float(self.script(keys=[key], args=[rate, burst]))
+
+
+_redis_buckets = {}
+
+
+def redis_bucket() -> RedisTokenBucket:
+    """Token buckets in the configured Redis, shared by every process"""
+
+    redis = get_redis()
+    backend = _redis_buckets.get(id(redis))
+
+    if backend is None:
+        backend = _redis_buckets[id(redis)] = RedisTokenBucket(redis)
+
+    return backend
+
+
+def get_backend(local: TokenBucket):
+    """Limiter for the configured RATE_LIMIT_BACKEND, local if in-process"""
+
+    if current_app.config.get("RATE_LIMIT_BACKEND") != "redis":
+        return local
+
+    return redis_bucket()
+
+
+def limit(name: str, per_second: float, burst: int):
+    """Allow a client per_second requests to the route on average, and up
+    to burst at once. Goes below jwt_required so clients are identified.
+    """
+
+    def decorator(view):
+        local = TokenBucket()
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get("RATE_LIMIT_ENABLED", True):
+                return view(*args, **kwargs)
+
+            rate, capacity = current_app.config.get("RATE_LIMITS", {}).get(
+                name, (per_second, burst)
+            )
+            client = db_routing.current_identity() or request.remote_addr
+            key = KEY_FORMAT.format(name=name, client=client)
+
+            try:
+                wait = get_backend(local).acquire(key, rate, capacity)
+            except RedisError as err:
+                current_app.logger.warning("rate limit store unavailable: %s", err)
+                wait = local.acquire(key, rate, capacity)
+
+            if wait > 0:
+                return _too_many_requests(wait)
+
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _too_many_requests(wait: float):
+    response = schemas.respond(
+        create_response(
+            message="rate limit exceeded", success=False, status="Too Many Requests"
+        )
+    )
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, math.ceil(wait)))
+
+    return response
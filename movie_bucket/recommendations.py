@@ -0,0 +1,241 @@
+"""Item-to-item recommendations from bucket co-occurrence.
+
+Buckets and movies form a sparse binary matrix. Two movies are similar when
+they tend to share buckets, scored by cosine or Jaccard similarity over
+their bucket sets. The top neighbours of every movie are precomputed into
+movie_neighbours so serving suggestions is a single indexed query.
+"""
+
+import numpy as np
+
+from scipy import sparse
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from typing import List
+
+from models import db, Buckets_Movies, BucketChange, MovieNeighbour
+from movie_bucket.redis_client import get_redis
+
+NEIGHBOURS_PER_MOVIE = 20
+ROWS_PER_CHUNK = 2000
+MATRIX_READ_SIZE = 10000
+SIMILARITY_METRICS = ["cosine", "jaccard"]
+
+WATERMARK_KEY = "recommendations:watermark"
+
+
+########################################################
+###-----------------------------------------------MATRIX
+
+
+def load_matrix():
+    """Build the bucket x movie matrix from buckets_movies.
+
+    Returns the matrix in CSC form (cheap column slicing) and the movie id
+    of each column.
+    """
+
+    result = db.session.execute(
+        select(Buckets_Movies.bucket_id, Buckets_Movies.movie_id).execution_options(
+            yield_per=MATRIX_READ_SIZE
+        )
+    )
+
+    # fill int arrays a batch at a time, only one batch of rows is ever
+    # held as Python objects
+    bucket_chunks = [np.empty(0, dtype=np.int64)]
+    movie_chunks = [np.empty(0, dtype=np.int64)]
+
+    for batch in result.partitions():
+        count = len(batch)
+        bucket_chunks.append(
+            np.fromiter((row[0] for row in batch), dtype=np.int64, count=count)
+        )
+        movie_chunks.append(
+            np.fromiter((row[1] for row in batch), dtype=np.int64, count=count)
+        )
+
+    bucket_ids = np.concatenate(bucket_chunks)
+    del bucket_chunks
+    _, bucket_index = np.unique(bucket_ids, return_inverse=True)
+
+    movie_ids = np.concatenate(movie_chunks)
+    del movie_chunks
+    movie_ids, movie_index = np.unique(movie_ids, return_inverse=True)
+
+    matrix = sparse.csc_matrix(
+        (np.ones(len(bucket_ids), dtype=np.float32), (bucket_index, movie_index)),
+        shape=(bucket_index.max(initial=-1) + 1, len(movie_ids)),
+    )
+
+    return matrix, movie_ids
+
+
+def top_neighbours(matrix, rows: np.ndarray, metric: str):
+    """Score the given movie columns against every movie and keep the top
+    NEIGHBOURS_PER_MOVIE of each. Returns (row, neighbour, score) arrays of
+    column indices."""
+
+    bucket_counts = np.asarray(matrix.sum(axis=0)).ravel()
+
+    co_occurrence = (matrix[:, rows].T @ matrix).tocoo()
+    row, col, shared = co_occurrence.row, co_occurrence.col, co_occurrence.data
+
+    # a movie is not its own neighbour
+    keep = rows[row] != col
+    row, col, shared = row[keep], col[keep], shared[keep]
+
+    row_counts = bucket_counts[rows[row]]
+    col_counts = bucket_counts[col]
+
+    if metric == "jaccard":
+        scores = shared / (row_counts + col_counts - shared)
+    else:
+        scores = shared / np.sqrt(row_counts * col_counts)
+
+    # best first within each row, then rank inside the row
+    order = np.lexsort((-scores, row))
+    row, col, scores = row[order], col[order], scores[order]
+
+    rank = np.arange(len(row)) - np.searchsorted(row, row, side="left")
+    keep = rank < NEIGHBOURS_PER_MOVIE
+
+    return rows[row[keep]], col[keep], scores[keep]
+
+
+def affected_columns(matrix, movie_ids: np.ndarray, dirty_ids: List[int]):
+    """Columns whose neighbour lists can change when the dirty movies'
+    bucket sets change: the dirty movies and everything sharing a bucket
+    with them."""
+
+    dirty = np.flatnonzero(np.isin(movie_ids, dirty_ids))
+
+    if not len(dirty):
+        return dirty
+
+    touched = (matrix[:, dirty].T @ matrix).tocoo().col
+
+    return np.union1d(dirty, touched)
+
+
+def former_co_members(bucket_ids) -> List[int]:
+    """Movies currently in the buckets a movie was removed from"""
+
+    if not bucket_ids:
+        return []
+
+    return [
+        movie_id
+        for (movie_id,) in db.session.query(Buckets_Movies.movie_id)
+        .filter(Buckets_Movies.bucket_id.in_(bucket_ids))
+        .distinct()
+    ]
+
+
+########################################################
+###----------------------------------------------REFRESH
+
+
+def refresh_neighbours(full: bool = False, metric: str = "cosine") -> int:
+    """Recompute neighbour lists, only for movies affected by changes since
+    the last run unless full. Returns the number of movies refreshed."""
+
+    if metric not in SIMILARITY_METRICS:
+        raise ValueError(f"unknown similarity metric {metric}")
+
+    redis = get_redis()
+    watermark = int(redis.get(WATERMARK_KEY) or 0)
+
+    # read before loading the matrix so concurrent changes are picked up next
+    # run; seqs follow commit order, so none committed below it is missed
+    latest = db.session.query(func.max(BucketChange.seq)).scalar() or 0
+
+    matrix, movie_ids = load_matrix()
+
+    if full or not watermark:
+        columns = np.arange(len(movie_ids))
+        stale_ids = None
+    else:
+        changes = (
+            db.session.query(
+                BucketChange.entity_id, BucketChange.bucket_id, BucketChange.op
+            )
+            .filter(BucketChange.entity == "movie", BucketChange.seq > watermark)
+            .distinct()
+            .all()
+        )
+        dirty_ids = list({entity_id for entity_id, _, _ in changes})
+        columns = affected_columns(matrix, movie_ids, dirty_ids)
+
+        # movies still in a bucket a dirty movie left no longer share it, so
+        # the matrix doesn't link them, but they lose it as a neighbour
+        former_ids = former_co_members(
+            {bucket_id for _, bucket_id, op in changes if op == "delete"}
+        )
+        columns = np.union1d(columns, np.flatnonzero(np.isin(movie_ids, former_ids)))
+
+        # dirty movies no longer in any bucket only lose their neighbours
+        stale_ids = np.setdiff1d(dirty_ids, movie_ids).tolist()
+
+    for start in range(0, len(columns), ROWS_PER_CHUNK):
+        chunk = columns[start : start + ROWS_PER_CHUNK]
+        row, col, scores = top_neighbours(matrix, chunk, metric)
+
+        _replace_neighbours(
+            movie_ids[chunk].tolist(),
+            [
+                {"movie_id": movie_id, "neighbour_id": neighbour_id, "score": score}
+                for movie_id, neighbour_id, score in zip(
+                    movie_ids[row].tolist(), movie_ids[col].tolist(), scores.tolist()
+                )
+            ],
+        )
+
+    if stale_ids:
+        _replace_neighbours(stale_ids, [])
+
+    if full:
+        _delete_orphaned_neighbours()
+
+    redis.set(WATERMARK_KEY, latest)
+
+    return len(columns)
+
+
+def _replace_neighbours(movie_ids: List[int], neighbours: List[dict]):
+    """Swap the stored neighbour lists of the movies in one transaction"""
+
+    table = MovieNeighbour.__table__
+
+    try:
+        db.session.execute(table.delete().where(table.c.movie_id.in_(movie_ids)))
+
+        if neighbours:
+            db.session.execute(table.insert(), neighbours)
+
+        db.session.commit()
+
+    except IntegrityError as err:
+        db.session.rollback()
+
+        error_message = err.orig.diag.message_detail
+
+        raise err(error_message)
+
+
+def _delete_orphaned_neighbours():
+    """Remove neighbour lists of movies that left every bucket"""
+
+    table = MovieNeighbour.__table__
+    linked = db.session.query(Buckets_Movies.movie_id)
+
+    try:
+        db.session.execute(table.delete().where(table.c.movie_id.notin_(linked)))
+        db.session.commit()
+
+    except IntegrityError as err:
+        db.session.rollback()
+
+        error_message = err.orig.diag.message_detail
+
+        raise err(error_message)
@@ -0,0 +1,19 @@
+"""Shared Redis connection for Movie Bucket."""
+
+import redis
+
+from flask import current_app
+
+_clients = {}
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client for the configured REDIS_URL"""
+
+    url = current_app.config["REDIS_URL"]
+
+    client = _clients.get(url)
+    if client is None:
+        client = _clients[url] = redis.Redis.from_url(url)
+
+    return client
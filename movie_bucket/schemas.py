@@ -0,0 +1,267 @@
+"""Request and response schemas.
+
+JSON bodies are decoded straight into typed structs, validating once.
+Responses are still built as dicts by the models' serialize() and
+helpers.create_response, and are only encoded to JSON bytes by a shared
+msgspec encoder instead of going through jsonify. The hot routes serve
+dicts cached in Redis, so building structs there would add a conversion
+rather than save one. The *Out structs only document what each route
+returns; with VALIDATE_RESPONSES set, e.g. in development, every response
+dict is checked against its schema before it is sent.
+"""
+
+import functools
+import msgspec
+
+from flask import Response, current_app, request
+from msgspec import UNSET, UnsetType
+from typing import Any, Dict, List, Optional, Union
+
+
+class Body(msgspec.Struct):
+    """Request body, unknown fields are ignored"""
+
+
+class Out(msgspec.Struct, forbid_unknown_fields=True):
+    """Response payload schema, unknown fields are a bug"""
+
+
+########################################################
+###-----------------------------------------------BODIES
+
+
+class Credentials(Body):
+    username: str
+    password: str
+
+
+class SignupBody(Credentials):
+    email: str
+
+
+class NewBucketBody(Body):
+    bucket_name: str
+    genre: Optional[str] = None
+    description: Optional[str] = None
+
+
+class BucketPatchBody(Body):
+    """Only the fields sent are updated"""
+
+    bucket_name: Union[str, UnsetType] = UNSET
+    genre: Union[Optional[str], UnsetType] = UNSET
+    description: Union[Optional[str], UnsetType] = UNSET
+
+
+class BucketRefBody(Body):
+    bucket_id: int
+
+
+class NewMovieBody(Body):
+    """release_date and runtime are parsed by helpers, TMDB and imports
+    send them in several shapes"""
+
+    bucket_id: int
+    id: int
+    title: str
+    image: Optional[str] = None
+    release_date: Optional[str] = None
+    runtime: Union[int, str, None] = None
+    genre: Optional[str] = None
+    bio: Optional[str] = None
+
+
+class BucketMovieBody(Body):
+    bucket_id: int
+    movie_id: int
+
+
+class LinkBody(Body):
+    user_id: int
+    bucket_id: int
+    invite_code: str
+
+
+class SubRequest(Body):
+    """One request of a batch, params go in the query string"""
+
+    path: str
+    method: str = "GET"
+    params: Dict[str, Union[str, int, float, bool]] = msgspec.field(
+        default_factory=dict
+    )
+    body: Any = None
+
+
+class BatchBody(Body):
+    requests: List[SubRequest]
+    parallel: bool = False
+
+
+########################################################
+###----------------------------------------------OUTPUTS
+
+
+class StatusOut(Out):
+    message: str
+    success: bool
+    status: str
+
+
+class UserOut(Out):
+    id: int
+    username: str
+    email: str
+
+
+class AuthOut(StatusOut):
+    access_token: str
+    user: UserOut
+
+
+class MovieOut(Out):
+    id: int
+    title: str
+    is_watched: Optional[bool]
+    image: Union[str, UnsetType] = UNSET
+    release_date: Union[str, UnsetType] = UNSET
+    runtime: Union[int, UnsetType] = UNSET
+    genre: Union[str, UnsetType] = UNSET
+    bio: Union[str, UnsetType] = UNSET
+
+
+class ScoredMovieOut(MovieOut, kw_only=True):
+    score: float
+
+
+class SearchResultOut(Out):
+    id: int
+    title: Optional[str]
+    image: Optional[str]
+    release_date: Optional[str]
+    bio: Optional[str]
+    bucket_ids: Union[List[int], UnsetType] = UNSET
+
+
+class BucketOut(Out):
+    id: int
+    bucket_name: str
+    genre: Union[str, UnsetType] = UNSET
+    description: Union[str, UnsetType] = UNSET
+
+
+class BucketInfoOut(Out):
+    bucket: BucketOut
+    authorized_users: List[UserOut]
+
+
+class BucketCreatedOut(StatusOut, kw_only=True):
+    bucket: BucketOut
+    authorized_users: Union[List[UserOut], UnsetType] = UNSET
+
+
+class BucketUpdatedOut(StatusOut):
+    bucket: BucketOut
+
+
+class BucketLinkedOut(StatusOut):
+    bucket: BucketOut
+    authorized_users: List[UserOut]
+
+
+class MovieAddedOut(StatusOut):
+    bucket: BucketOut
+    movie: MovieOut
+
+
+class MoviePatchedOut(StatusOut):
+    movie: MovieOut
+
+
+class ChangeOut(Out):
+    id: int
+    seq: int
+    bucket_id: int
+    entity: str
+    entity_id: int
+    op: str
+    data: Union[Dict[str, Any], UnsetType] = UNSET
+
+
+class ChangesOut(Out):
+    changes: List[ChangeOut]
+    cursor: int
+    has_more: bool
+
+
+class TaskAcceptedOut(StatusOut):
+    task_id: str
+
+
+class TaskOut(Out):
+    task_id: str
+    state: str
+    progress: Union[Dict[str, Any], UnsetType] = UNSET
+
+
+class BucketLinkOut(Out):
+    id: int
+    bucket_id: int
+    invite_code: str
+    # an HTTP date, as jsonify sent it
+    expiration_date: str
+
+
+class InviteOut(StatusOut):
+    bucket_link: BucketLinkOut
+
+
+class SubResponseOut(Out):
+    status: int
+    body: Any
+
+
+CacheStatsOut = Dict[str, Dict[str, float]]
+
+
+########################################################
+###-----------------------------------------------CODECS
+
+
+encoder = msgspec.json.Encoder()
+
+
+def body(schema):
+    """Decode the JSON body into schema and pass it to the view as body.
+    Invalid bodies get a Bad Request response without calling the view."""
+
+    decoder = msgspec.json.Decoder(schema)
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                kwargs["body"] = decoder.decode(request.get_data())
+            except msgspec.DecodeError as err:
+                return respond(
+                    {"message": str(err), "success": False, "status": "Bad Request"}
+                )
+
+            return view(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def respond(payload, schema=StatusOut) -> Response:
+    """Encode a payload of dicts and lists to a JSON response. schema is
+    what the payload should look like and is only checked with
+    VALIDATE_RESPONSES; plain status messages are the default"""
+
+    if current_app.config.get("VALIDATE_RESPONSES"):
+        msgspec.convert(payload, schema)
+
+    return current_app.response_class(
+        encoder.encode(payload), mimetype="application/json"
+    )
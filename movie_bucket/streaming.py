@@ -0,0 +1,112 @@
+"""Streamed JSON array responses with negotiated compression.
+
+Collection endpoints can send their items as they come off a database
+cursor instead of building the whole list and JSON string first. Items are
+encoded in chunks of about CHUNK_BYTES and compressed on the fly with
+brotli or gzip, whichever the client accepts and we support, so neither
+the full payload nor its compressed form is ever held in memory.
+"""
+
+import zlib
+
+from flask import Response, request, stream_with_context
+from typing import Iterable, Iterator, Optional
+
+from movie_bucket.schemas import encoder
+
+try:
+    import brotli
+except ImportError:  # optional, gzip only without it
+    brotli = None
+
+CHUNK_BYTES = 16 * 1024
+
+# gzip framing for zlib
+GZIP_WBITS = 31
+
+
+def json_array(items: Iterable) -> Iterator[bytes]:
+    """Yields a JSON array of items in chunks of about CHUNK_BYTES"""
+
+    buffer = bytearray(b"[")
+    first = True
+
+    for item in items:
+        if not first:
+            buffer += b","
+
+        buffer += encoder.encode(item)
+        first = False
+
+        if len(buffer) >= CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+
+    buffer += b"]"
+    yield bytes(buffer)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Best supported content coding the client accepts, None for identity"""
+
+    accepted = {}
+
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                continue
+
+        accepted[coding.strip().lower()] = quality
+
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+    for coding in supported:
+        if accepted.get(coding, accepted.get("*", 0)) > 0:
+            return coding
+
+    return None
+
+
+def compress(chunks: Iterable[bytes], coding: Optional[str]) -> Iterator[bytes]:
+    """Compresses chunks as they arrive, flushing each so the client can
+    start decoding before the end of the stream"""
+
+    if coding is None:
+        yield from chunks
+        return
+
+    if coding == "br":
+        compressor = brotli.Compressor()
+
+        for chunk in chunks:
+            yield compressor.process(chunk) + compressor.flush()
+
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(wbits=GZIP_WBITS)
+
+    for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    yield compressor.flush()
+
+
+def stream_json_array(items: Iterable) -> Response:
+    """Streams items as a JSON array, compressed as the request accepts"""
+
+    coding = negotiate_encoding(request.headers.get("Accept-Encoding", ""))
+    body = compress(json_array(items), coding)
+
+    response = Response(stream_with_context(body), mimetype="application/json")
+    response.headers["Vary"] = "Accept-Encoding"
+
+    if coding is not None:
+        response.headers["Content-Encoding"] = coding
+
+    return response
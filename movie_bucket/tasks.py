@@ -1,13 +1,17 @@
-from movie_bucket.app import celery
-from helpers import clean_up_links
-from models import BucketLink
+from movie_bucket.celery_app import celery
 from datetime import datetime
 
+# tasks import what they run in their bodies, so loading this module for
+# the beat schedule doesn't pull in helpers and every module behind it
+
 
 @celery.task()
 def clean_up_expired_links():
     """Automated function to clean up expired links"""
 
+    from helpers import clean_up_links
+    from models import BucketLink
+
     current_time = datetime.now()
 
     expired_links = BucketLink.query.filter(
@@ -24,3 +28,143 @@ def clean_up_expired_links():
     )
 
     pass
+
+
+@celery.task()
+def compact_bucket_changes():
+    """Automated function to drop superseded bucket change log entries"""
+
+    from helpers import compact_changes
+
+    removed = compact_changes()
+
+    print(
+        f"compact_bucket_changes ran at {datetime.now()}, {removed} changes removed."
+    )
+
+
+@celery.task(bind=True)
+def import_watchlist(self, bucket_id, user_id, upload_key, file_format):
+    """Stream-parse an uploaded watchlist and add its movies to a bucket"""
+
+    from helpers import get_bucket
+    from movie_bucket import importer
+
+    def report_progress(counts):
+        self.update_state(
+            state="PROGRESS",
+            meta={"user_id": user_id, "bucket_id": bucket_id, **counts},
+        )
+
+    try:
+        if get_bucket(bucket_id) is None:
+            return {"user_id": user_id, "bucket_id": bucket_id, "error": "not found"}
+
+        data = importer.load_upload(upload_key)
+
+        if data is None:
+            return {"user_id": user_id, "bucket_id": bucket_id, "error": "expired"}
+
+        rows = importer.iter_rows(data, file_format)
+        counts = importer.import_rows(bucket_id, rows, on_progress=report_progress)
+
+    finally:
+        importer.discard_upload(upload_key)
+
+    enrich_movie_details.delay()
+
+    print(f"import_watchlist ran at {datetime.now()}, {counts['added']} movies added.")
+
+    return {"user_id": user_id, "bucket_id": bucket_id, **counts}
+
+
+@celery.task()
+def enrich_movie_details(movie_ids=None):
+    """Fetch TMDB details for the given movies, or for a run's worth of the
+    movies missing them when run periodically, one such run at a time"""
+
+    from movie_bucket import enrichment
+
+    sweep = movie_ids is None
+
+    if sweep and not enrichment.claim_run():
+        print(f"enrich_movie_details skipped at {datetime.now()}, already running.")
+        return
+
+    try:
+        pending = enrichment.find_movies_missing_details(movie_ids)
+        enriched = 0
+
+        for start in range(0, len(pending), enrichment.ENRICHMENT_BATCH_SIZE):
+            batch = pending[start : start + enrichment.ENRICHMENT_BATCH_SIZE]
+            enriched += enrichment.enrich_movies(batch)
+
+    finally:
+        if sweep:
+            enrichment.release_run()
+
+    print(
+        f"enrich_movie_details ran at {datetime.now()}, {enriched} movies enriched."
+    )
+
+
+@celery.task()
+def refresh_recommendations(full=False, metric="cosine"):
+    """Recompute precomputed movie neighbours, incrementally unless full"""
+
+    # numpy and scipy are slow to import, only pay for them when this runs
+    from movie_bucket import recommendations
+
+    refreshed = recommendations.refresh_neighbours(full=full, metric=metric)
+
+    print(
+        f"refresh_recommendations ran at {datetime.now()}, "
+        f"{refreshed} movies refreshed."
+    )
+
+
+@celery.task()
+def refresh_trending():
+    """Recompute the trending and most-added rankings"""
+
+    from movie_bucket import trending
+
+    sizes = trending.refresh_rankings()
+
+    print(f"refresh_trending ran at {datetime.now()}, rankings sized {sizes}.")
+
+
+@celery.task(bind=True)
+def purge_bucket(self, bucket_id, user_id=None):
+    """Delete a soft deleted bucket's rows in chunks, reporting progress"""
+
+    from helpers import purge_bucket as purge_bucket_rows
+
+    def report_progress(counts):
+        self.update_state(
+            state="PROGRESS",
+            meta={"user_id": user_id, "bucket_id": bucket_id, "deleted": counts},
+        )
+
+    counts = purge_bucket_rows(bucket_id, on_progress=report_progress)
+
+    print(f"purge_bucket ran at {datetime.now()}, bucket {bucket_id}: {counts}.")
+
+    return {"user_id": user_id, "bucket_id": bucket_id, "deleted": counts}
+
+
+@celery.task()
+def purge_deleted_buckets():
+    """Automated sweep purging deleted buckets whose purge never finished"""
+
+    from helpers import find_buckets_to_purge, purge_bucket as purge_bucket_rows
+
+    bucket_ids = find_buckets_to_purge()
+
+    for bucket_id in bucket_ids:
+        purge_bucket_rows(bucket_id)
+
+    print(
+        f"purge_deleted_buckets ran at {datetime.now()}, "
+        f"{len(bucket_ids)} buckets purged."
+    )
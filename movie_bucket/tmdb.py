@@ -0,0 +1,231 @@
+"""Client for The Movie Database (TMDB) API.
+
+Requests go through a transport picked by TMDB_TRANSPORT: "live" calls
+TMDB, "record" calls TMDB and saves each response as a cassette in
+TMDB_CASSETTE_DIR, and "replay" answers from those cassettes without
+touching the network, for offline and reproducible benchmarks.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+
+from flask import current_app
+from redis.exceptions import RedisError
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+BASE_API_URL = "https://api.themoviedb.org/3/"
+TARGET_FIELDS_FOR_API = ["id", "title", "poster_path", "release_date", "overview"]
+
+MOVIE_FIELD_MAP = {
+    "id": "id",
+    "title": "title",
+    "poster_path": "image",
+    "release_date": "release_date",
+    "overview": "bio",
+}
+
+# budget for background jobs, keeps interactive search within TMDB's limits
+BACKGROUND_REQUESTS_PER_SECOND = 20
+BACKGROUND_LIMIT_KEY = "ratelimit:tmdb:background"
+
+
+class RateLimiter:
+    """Spaces calls out evenly to stay under a requests-per-second budget.
+    Safe to share between threads."""
+
+    def __init__(self, per_second: float):
+        self.interval = 1.0 / per_second
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """Block until the caller may make its next request"""
+
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class SharedRateLimiter(RateLimiter):
+    """Keeps every worker process together under one requests-per-second
+    budget with a token bucket in Redis. Needs an app context; spaces calls
+    out per process while Redis is unavailable."""
+
+    def __init__(self, per_second: float, key: str):
+        super().__init__(per_second)
+        self.per_second = per_second
+        self.key = key
+
+    def wait(self):
+        # rate_limit pulls in the web helpers, only import it when used
+        from movie_bucket import rate_limit
+
+        while True:
+            try:
+                delay = rate_limit.redis_bucket().acquire(
+                    self.key, self.per_second, 1
+                )
+            except RedisError as err:
+                current_app.logger.warning("shared TMDB budget unavailable: %s", err)
+                return super().wait()
+
+            if delay <= 0:
+                return
+
+            time.sleep(delay)
+
+
+background_limiter = SharedRateLimiter(
+    BACKGROUND_REQUESTS_PER_SECOND, BACKGROUND_LIMIT_KEY
+)
+
+
+def get_headers() -> Dict[str, str]:
+    """Headers for authenticating with TMDB"""
+
+    auth_key = current_app.config["AUTH_KEY"]
+
+    return {"accept": "application/json", "Authorization": f"Bearer {auth_key}"}
+
+
+def api_url(path: str) -> str:
+    """URL of a TMDB endpoint, TMDB_BASE_URL can point at a local stub"""
+
+    return f"{current_app.config['TMDB_BASE_URL']}{path}"
+
+
+########################################################
+###-------------------------------------------TRANSPORTS
+
+
+class CassetteMissing(LookupError):
+    """Replay was asked for a request that was never recorded"""
+
+
+class LiveTransport:
+    """Calls TMDB over HTTP"""
+
+    def get(self, path: str, params: Optional[Dict] = None) -> Tuple[int, Dict]:
+        response = requests.get(api_url(path), params=params, headers=get_headers())
+
+        return response.status_code, response.json()
+
+
+class RecordingTransport(LiveTransport):
+    """Calls TMDB and saves every response as a cassette"""
+
+    def __init__(self, cassette_dir: str):
+        self.cassette_dir = cassette_dir
+
+    def get(self, path: str, params: Optional[Dict] = None) -> Tuple[int, Dict]:
+        status, body = super().get(path, params)
+
+        os.makedirs(self.cassette_dir, exist_ok=True)
+        cassette = {
+            "request": {"path": path, "params": params or {}},
+            "status": status,
+            "body": body,
+        }
+
+        name = cassette_name(path, params)
+        with open(os.path.join(self.cassette_dir, name), "w") as file:
+            json.dump(cassette, file, indent=2)
+
+        return status, body
+
+
+class ReplayTransport:
+    """Answers from recorded cassettes, never calls TMDB"""
+
+    def __init__(self, cassette_dir: str):
+        self.cassette_dir = cassette_dir
+
+    def get(self, path: str, params: Optional[Dict] = None) -> Tuple[int, Dict]:
+        cassette = load_cassette(self.cassette_dir, path, params)
+        if cassette is None:
+            raise CassetteMissing(f"no cassette for {path} {params or {}}")
+
+        return cassette["status"], cassette["body"]
+
+
+def cassette_name(path: str, params: Optional[Dict] = None) -> str:
+    """File name of the cassette for a request, stable across runs"""
+
+    query = urlencode(sorted((params or {}).items()))
+    digest = hashlib.sha1(f"{path}?{query}".encode()).hexdigest()[:16]
+
+    return f"{path.replace('/', '_')}-{digest}.json"
+
+
+def load_cassette(cassette_dir: str, path: str, params: Optional[Dict] = None):
+    """Recorded cassette for a request, None if there isn't one"""
+
+    try:
+        with open(os.path.join(cassette_dir, cassette_name(path, params))) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def get_transport():
+    """Transport configured for the current app"""
+
+    mode = current_app.config.get("TMDB_TRANSPORT", "live")
+    cassette_dir = current_app.config.get("TMDB_CASSETTE_DIR")
+
+    if mode == "record":
+        return RecordingTransport(cassette_dir)
+    if mode == "replay":
+        return ReplayTransport(cassette_dir)
+
+    return LiveTransport()
+
+
+########################################################
+###---------------------------------------------REQUESTS
+
+
+def search_movies(query: str) -> List[Dict]:
+    """Searches TMDB and maps each result onto movie fields"""
+
+    status, data = get_transport().get("search/movie", {"query": query})
+
+    if status >= 400:
+        raise requests.HTTPError(f"TMDB returned {status} for search")
+
+    return [
+        {MOVIE_FIELD_MAP[field]: result.get(field) for field in TARGET_FIELDS_FOR_API}
+        for result in data["results"]
+    ]
+
+
+def get_movie_details(movie_id: int) -> Dict:
+    """Fetches TMDB details for a movie and maps them onto movie fields,
+    with runtime in minutes. Returns None if TMDB doesn't know the movie."""
+
+    status, data = get_transport().get(f"movie/{movie_id}")
+
+    if status == 404:
+        return None
+
+    if status >= 400:
+        raise requests.HTTPError(f"TMDB returned {status} for movie {movie_id}")
+
+    genres = ", ".join(genre["name"] for genre in data.get("genres") or [])
+
+    return {
+        "image": data.get("poster_path"),
+        "release_date": data.get("release_date") or None,
+        "runtime": data.get("runtime") or None,
+        "genre": genres or None,
+        "bio": data.get("overview") or None,
+    }
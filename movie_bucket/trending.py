@@ -0,0 +1,121 @@
+"""Precomputed trending and most-added movie rankings.
+
+Rankings are computed from recent buckets_movies inserts and materialized
+into Redis sorted sets, with the serialized movies kept in a hash next to
+them, so serving the top k never touches Postgres.
+
+Trending decays each add exponentially with a TRENDING_HALF_LIFE_HOURS
+half-life; most-added is the raw count inside the window.
+"""
+
+import json
+import math
+
+from datetime import datetime, timedelta
+from sqlalchemy import func, literal
+from typing import Dict, List
+
+from models import db, Movie, Buckets_Movies
+from movie_bucket.redis_client import get_redis
+
+TRENDING_WINDOW_DAYS = 14
+TRENDING_HALF_LIFE_HOURS = 72
+RANKING_SIZE = 100
+
+RANKING_KEYS = {
+    "trending": "rankings:trending",
+    "most_added": "rankings:most_added",
+}
+MOVIES_KEY = "rankings:movies"
+
+
+def refresh_rankings() -> Dict[str, int]:
+    """Recompute every ranking and swap it in atomically"""
+
+    now = datetime.now()
+    cutoff = now - timedelta(days=TRENDING_WINDOW_DAYS)
+
+    age_hours = func.extract("epoch", literal(now) - Buckets_Movies.added_at) / 3600
+    decayed = func.sum(
+        func.exp(-math.log(2) * age_hours / TRENDING_HALF_LIFE_HOURS)
+    ).label("decayed")
+    added = func.count().label("added")
+
+    recent = (
+        db.session.query(Buckets_Movies.movie_id, decayed, added)
+        .filter(Buckets_Movies.added_at >= cutoff)
+        .group_by(Buckets_Movies.movie_id)
+    )
+
+    scores = {
+        "trending": {
+            # extract() yields numeric on recent Postgres versions
+            movie_id: float(score)
+            for movie_id, score, _ in recent.order_by(decayed.desc()).limit(
+                RANKING_SIZE
+            )
+        },
+        "most_added": {
+            movie_id: count
+            for movie_id, _, count in recent.order_by(added.desc()).limit(
+                RANKING_SIZE
+            )
+        },
+    }
+
+    movie_ids = set().union(*scores.values())
+    movies = {
+        movie.id: json.dumps(movie.serialize())
+        for movie in Movie.query.filter(Movie.id.in_(movie_ids))
+    }
+
+    # MULTI/EXEC, so readers see either the old or the new rankings
+    pipe = get_redis().pipeline()
+
+    for name, key in RANKING_KEYS.items():
+        ranked = {
+            movie_id: score
+            for movie_id, score in scores[name].items()
+            if movie_id in movies
+        }
+
+        pipe.delete(key)
+        if ranked:
+            pipe.zadd(key, ranked)
+
+    pipe.delete(MOVIES_KEY)
+    if movies:
+        pipe.hset(MOVIES_KEY, mapping=movies)
+
+    pipe.execute()
+
+    return {name: len(ranked) for name, ranked in scores.items()}
+
+
+def get_ranking(name: str, limit: int) -> List[Dict]:
+    """Serialized top movies of a ranking, best first"""
+
+    redis = get_redis()
+
+    ranked = redis.zrevrange(RANKING_KEYS[name], 0, limit - 1, withscores=True)
+    if not ranked:
+        return []
+
+    movies = redis.hmget(MOVIES_KEY, [movie_id for movie_id, _ in ranked])
+
+    return [
+        {**json.loads(movie), "score": score}
+        for (_, score), movie in zip(ranked, movies)
+        if movie is not None
+    ]
+
+
+def get_popularity(movie_ids: List[int]) -> Dict[int, float]:
+    """Trending score of each movie, 0 for movies not trending"""
+
+    if not movie_ids:
+        return {}
+
+    scores = get_redis().zmscore(RANKING_KEYS["trending"], movie_ids)
+
+    return {movie_id: score or 0.0 for movie_id, score in zip(movie_ids, scores)}
@@ -1,50 +1,311 @@
-"""Seed database with sample data."""
+"""Seed database with synthetic data.
 
-from app import db
-from models import Movie, User, Bucket, User_Buckets, Buckets_Movies
+Generates a deterministic dataset of any size: zipf-skewed movie
+popularity, bucket sizes spread around an average, a few buckets shared
+between many users and a few large shared buckets. Rows are bulk loaded
+with COPY on Postgres (executemany elsewhere) in chunks, so millions of
+rows load in minutes.
 
-db.drop_all()
-db.create_all()
+    python seed.py                                   # development sized
+    python seed.py --movies 2000000 --buckets 500000 --users 100000
 
-# Create some movies
-movie1 = Movie(title='Movie 1', release_date='2022-01-01', runtime='120 min', genre='Action', bio='Movie 1 description')
-movie2 = Movie(title='Movie 2', release_date='2022-02-01', runtime='110 min', genre='Comedy', bio='Movie 2 description')
-movie3 = Movie(title='Movie 3', release_date='2022-03-01', runtime='130 min', genre='Drama', bio='Movie 3 description')
+Every table is dropped and recreated first.
+"""
 
-# Add movies to the session
-db.session.add_all([movie1, movie2, movie3])
-db.session.commit()
+import io
+import csv
+import sys
+import random
+import argparse
+import itertools
 
-# Create users
-user1 = User.signup('user1', 'user1@example.com', 'password123')
-user2 = User.signup('user2', 'user2@example.com', 'password456')
+from datetime import date, datetime, timedelta
+from sqlalchemy import text
 
-# Add users to the session
-db.session.add_all([user1, user2])
-db.session.commit()
+from models import (
+    db,
+    bcrypt,
+    User,
+    Movie,
+    Bucket,
+    BucketLink,
+    User_Buckets,
+    Buckets_Movies,
+)
 
-# Create buckets
-bucket1 = Bucket(bucket_name='Bucket 1', genre='Action', description='Bucket 1 description')
-bucket2 = Bucket(bucket_name='Bucket 2', genre='Comedy', description='Bucket 2 description')
+GENRES = ["Action", "Comedy", "Drama", "Horror", "Romance", "Sci-Fi", "Thriller"]
+CHUNK_SIZE = 50000
 
-# Add buckets to the session
-db.session.add_all([bucket1, bucket2])
-db.session.commit()
+# one bucket in ten is shared with a few collaborators
+SHARED_FRACTION = 0.1
+SHARED_MEMBERS = 3
 
-# Create associations between users and buckets
-user_bucket1 = User_Buckets(user_id=user1.id, bucket_id=bucket1.id)
-user_bucket2 = User_Buckets(user_id=user1.id, bucket_id=bucket2.id)
-user_bucket3 = User_Buckets(user_id=user2.id, bucket_id=bucket1.id)
+ADDED_WITHIN_MINUTES = 60 * 24 * 60
 
-# Add associations between users and buckets to the session
-db.session.add_all([user_bucket1, user_bucket2, user_bucket3])
-db.session.commit()
+INVITE_CODE = "SEEDED"
 
-# Create associations between buckets and movies
-bucket_movie1 = Buckets_Movies(bucket_id=bucket1.id, movie_id=movie1.id)
-bucket_movie2 = Buckets_Movies(bucket_id=bucket1.id, movie_id=movie2.id)
-bucket_movie3 = Buckets_Movies(bucket_id=bucket2.id, movie_id=movie3.id)
 
-# Add associations between buckets and movies to the session
-db.session.add_all([bucket_movie1, bucket_movie2, bucket_movie3])
-db.session.commit()
+def seed_dataset(
+    users=2000,
+    buckets=10000,
+    movies=50000,
+    movies_per_bucket=40,
+    large_buckets=5,
+    large_bucket_size=5000,
+    large_bucket_members=50,
+    seed=42,
+):
+    """Recreate every table and fill it with skewed, realistic volumes.
+
+    Returns the ids benchmarks need: a user, one of their buckets, movies
+    in it, and rows reserved for write routes.
+    """
+
+    rng = random.Random(seed)
+
+    db.drop_all()
+    db.create_all()
+
+    password = bcrypt.generate_password_hash("password").decode("UTF-8")
+    _insert(
+        User,
+        (
+            {
+                "id": i,
+                "username": f"user{i}",
+                "email": f"user{i}@example.com",
+                "password": password,
+            }
+            for i in range(1, users + 1)
+        ),
+    )
+
+    _insert(
+        Movie,
+        (
+            {
+                "id": i,
+                "title": f"Movie {i}",
+                "release_date": date(1950, 1, 1)
+                + timedelta(days=rng.randrange(27000)),
+                "runtime": rng.randrange(70, 200),
+                "genre": rng.choice(GENRES),
+                "is_watched": rng.random() < 0.3,
+            }
+            for i in range(1, movies + 1)
+        ),
+    )
+
+    _insert(
+        Bucket,
+        (
+            {"id": i, "bucket_name": f"bucket {i}", "genre": rng.choice(GENRES)}
+            for i in range(1, buckets + 1)
+        ),
+    )
+
+    # the last buckets are the large shared ones
+    large = range(max(2, buckets - large_buckets + 1), buckets + 1)
+
+    _insert(
+        User_Buckets,
+        (
+            {"user_id": user_id, "bucket_id": bucket_id}
+            for bucket_id in range(1, buckets + 1)
+            for user_id in _members(
+                rng,
+                bucket_id,
+                users,
+                large_bucket_members if bucket_id in large else 0,
+            )
+        ),
+    )
+
+    # zipf-like popularity, so a few movies sit in many buckets
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, movies + 1)))
+    now = datetime.now()
+
+    _insert(
+        Buckets_Movies,
+        (
+            {
+                "bucket_id": bucket_id,
+                "movie_id": movie_id,
+                "added_at": now
+                - timedelta(minutes=rng.randrange(ADDED_WITHIN_MINUTES)),
+            }
+            for bucket_id in range(1, buckets + 1)
+            for movie_id in _pick_movies(
+                rng,
+                weights,
+                _bucket_size(
+                    rng, bucket_id, movies_per_bucket, large, large_bucket_size
+                ),
+            )
+        ),
+    )
+
+    # ids were inserted explicitly, move the sequences past them
+    if db.engine.dialect.name == "postgresql":
+        for table in ("users", "movies", "buckets"):
+            db.session.execute(
+                text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"(SELECT max(id) FROM {table}))"
+                )
+            )
+
+        db.session.execute(text("ANALYZE"))
+
+    db.session.commit()
+
+    # an open invite to a bucket of user 1's, for someone not in it yet
+    invite_bucket_id = 1 + 2 * users
+    members = {
+        user_id
+        for (user_id,) in db.session.query(User_Buckets.user_id).filter(
+            User_Buckets.bucket_id == invite_bucket_id
+        )
+    }
+    invitee_id = min(set(range(1, users + 1)) - members)
+
+    db.session.add(
+        BucketLink(
+            bucket_id=invite_bucket_id,
+            invite_code=INVITE_CODE,
+            expiration_date=now + timedelta(days=1),
+        )
+    )
+    db.session.commit()
+
+    bucket_movie_ids = [
+        movie_id
+        for (movie_id,) in db.session.query(Buckets_Movies.movie_id)
+        .filter(Buckets_Movies.bucket_id == 1)
+        .order_by(Buckets_Movies.movie_id)
+    ]
+
+    return {
+        "user_id": 1,
+        "bucket_id": 1,
+        "credentials": {"username": "user1", "password": "password"},
+        "movie_id": bucket_movie_ids[0],
+        "doomed_movie_id": bucket_movie_ids[-1],
+        "doomed_bucket_id": 1 + users,
+        "invite": {
+            "user_id": invitee_id,
+            "bucket_id": invite_bucket_id,
+            "invite_code": INVITE_CODE,
+        },
+        "new_movie_id": movies + 1,
+    }
+
+
+def _members(rng, bucket_id, users, extra):
+    """Owner first, then collaborators for shared and large buckets"""
+
+    owner = (bucket_id - 1) % users + 1
+    members = {owner}
+
+    if extra:
+        members.update(rng.sample(range(1, users + 1), min(extra, users)))
+    elif rng.random() < SHARED_FRACTION:
+        members.update(rng.sample(range(1, users + 1), min(SHARED_MEMBERS, users)))
+
+    return sorted(members)
+
+
+def _bucket_size(rng, bucket_id, average, large, large_size):
+    """Most buckets are small, a few are long; bucket 1 is always average"""
+
+    if bucket_id in large:
+        return large_size
+    if bucket_id == 1:
+        return average
+
+    return max(1, int(rng.expovariate(1 / average)))
+
+
+def _pick_movies(rng, weights, count):
+    """Distinct popularity-weighted movie ids"""
+
+    count = min(count, len(weights))
+    picked = set()
+
+    while len(picked) < count:
+        picked.update(
+            rng.choices(range(1, len(weights) + 1), cum_weights=weights, k=count)
+        )
+
+    return sorted(picked)[:count]
+
+
+def _insert(model, rows):
+    """Bulk load rows in chunks, COPY on Postgres and executemany elsewhere"""
+
+    table = model.__table__
+    rows = iter(rows)
+    copy = db.engine.dialect.name == "postgresql"
+
+    while True:
+        chunk = list(itertools.islice(rows, CHUNK_SIZE))
+        if not chunk:
+            break
+
+        if copy:
+            _copy(table, chunk)
+        else:
+            db.session.execute(table.insert(), chunk)
+
+    db.session.commit()
+
+
+def _copy(table, chunk):
+    """COPY a chunk of rows into a table through the session's connection"""
+
+    columns = list(chunk[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # unquoted empty fields are NULL in COPY's CSV format
+    writer.writerows([row[column] for column in columns] for row in chunk)
+    buffer.seek(0)
+
+    cursor = db.session.connection().connection.cursor()
+    cursor.copy_expert(
+        f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+        buffer,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed database with synthetic data.")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--buckets", type=int, default=10000)
+    parser.add_argument("--movies", type=int, default=50000)
+    parser.add_argument("--movies-per-bucket", type=int, default=40)
+    parser.add_argument("--large-buckets", type=int, default=5)
+    parser.add_argument("--large-bucket-size", type=int, default=5000)
+    parser.add_argument("--large-bucket-members", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from movie_bucket.app import create_app
+
+    with create_app().app_context():
+        seed_dataset(
+            users=args.users,
+            buckets=args.buckets,
+            movies=args.movies,
+            movies_per_bucket=args.movies_per_bucket,
+            large_buckets=args.large_buckets,
+            large_bucket_size=args.large_bucket_size,
+            large_bucket_members=args.large_bucket_members,
+            seed=args.seed,
+        )
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
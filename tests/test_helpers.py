@@ -0,0 +1,91 @@
+import pytest
+
+from datetime import date
+from werkzeug.datastructures import MultiDict
+
+from helpers import parse_movie_filters, parse_release_date, parse_runtime
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, None),
+        (120, 120),
+        ("120", 120),
+        ("120 min", 120),
+        ("2h 5m", 125),
+        ("2 hours", 120),
+        ("1h30", 90),
+        ("", None),
+        ("unknown", None),
+    ],
+)
+def test_parse_runtime(value, expected):
+    assert parse_runtime(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, None),
+        (date(2022, 1, 31), date(2022, 1, 31)),
+        ("2022-01-31", date(2022, 1, 31)),
+        ("2022-01-31T00:00:00Z", date(2022, 1, 31)),
+        ("2022", date(2022, 1, 1)),
+        (2022, date(2022, 1, 1)),
+        ("", None),
+        ("0000", None),
+        ("2022-13-01", None),
+        ("soon", None),
+    ],
+)
+def test_parse_release_date(value, expected):
+    assert parse_release_date(value) == expected
+
+
+def test_parse_movie_filters():
+    args = MultiDict(
+        {
+            "genre": "Drama",
+            "watched": "FALSE",
+            "year_from": "1990",
+            "year_to": "1999",
+            "max_runtime": "120",
+            "sort": "-release_date",
+        }
+    )
+
+    assert parse_movie_filters(args) == {
+        "genre": "Drama",
+        "watched": False,
+        "year_from": 1990,
+        "year_to": 1999,
+        "max_runtime": 120,
+        "sort": "-release_date",
+    }
+
+
+def test_parse_movie_filters_drops_unparsed():
+    args = MultiDict(
+        {
+            "watched": "maybe",
+            "year_from": "nineties",
+            "max_runtime": "",
+            "sort": "-popularity",
+        }
+    )
+
+    assert parse_movie_filters(args) == {}
+
+
+@pytest.mark.parametrize(
+    "key, value", [("year_from", "0"), ("year_from", "-5"), ("year_to", "9999")]
+)
+def test_parse_movie_filters_drops_years_out_of_range(key, value):
+    assert parse_movie_filters(MultiDict({key: value})) == {}
+
+
+def test_parse_movie_filters_keeps_years_at_range_ends():
+    args = MultiDict({"year_from": "1", "year_to": "9998"})
+
+    assert parse_movie_filters(args) == {"year_from": 1, "year_to": 9998}
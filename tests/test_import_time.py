@@ -0,0 +1,13 @@
+"""Entry points must import within budget and only what their process uses.
+
+Each check imports the entry point in fresh interpreters, see
+benchmarks/import_time.py. Needs no database.
+"""
+
+from benchmarks import import_time
+
+
+def test_entry_points_import_within_budget():
+    failures = import_time.check()
+
+    assert not failures, "\n".join(failures)
@@ -0,0 +1,32 @@
+import pytest
+
+from movie_bucket.importer import iter_rows
+
+
+def test_iter_rows_csv():
+    data = (
+        "\ufefftitle,tmdb_id,year,watched\n"
+        "Heat,949,1995,yes\n"
+        ",,,\n"
+    ).encode("utf-8")
+
+    assert list(iter_rows(data, "csv")) == [
+        {"title": "Heat", "id": 949, "year": "1995"},
+        None,
+    ]
+
+
+def test_iter_rows_json():
+    data = b'["Heat", {"title": "Alien", "release_date": "1979-05-25"}, 42]'
+
+    assert list(iter_rows(data, "json")) == [
+        {"title": "Heat", "id": None, "year": None},
+        {"title": "Alien", "id": None, "year": "1979"},
+        None,
+    ]
+
+
+@pytest.mark.parametrize("data", [b'{"title": "Heat"}', b'["Heat"'])
+def test_iter_rows_rejects_malformed_json(data):
+    with pytest.raises(ValueError):
+        list(iter_rows(data, "json"))
@@ -0,0 +1,144 @@
+"""Every query issued by the routes in app.py must use an index.
+
+Seeds a synthetic dataset into BENCHMARK_DATABASE_URL, a scratch Postgres
+database that is dropped and recreated, drives every route through the
+Flask test client and runs EXPLAIN on each captured statement. Skipped
+when BENCHMARK_DATABASE_URL is unset.
+
+    BENCHMARK_DATABASE_URL=postgresql:///movie_bucket_bench \\
+        python -m pytest tests/test_query_plans.py
+"""
+
+import os
+import re
+import json
+import pytest
+
+from sqlalchemy import text
+
+pytestmark = pytest.mark.skipif(
+    not os.environ.get("BENCHMARK_DATABASE_URL"),
+    reason="needs BENCHMARK_DATABASE_URL, a scratch Postgres database",
+)
+
+# the planner rightly prefers full scans of tiny tables, and for statements
+# returning a good share of the table, e.g. every bucket of a popular movie
+FULL_SCAN_ROW_LIMIT = 1000
+FULL_SCAN_SHARE = 0.1
+
+EXPLAINABLE = ("SELECT", "UPDATE", "DELETE", "WITH")
+
+
+def table_sizes(db):
+    """Estimated row count of every table, from ANALYZE statistics"""
+
+    rows = db.session.execute(
+        text("SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'")
+    )
+
+    return {name: tuples for name, tuples in rows}
+
+
+def index_columns(db):
+    """Table and leading column of every index"""
+
+    rows = db.session.execute(
+        text(
+            "SELECT idx.relname, tbl.relname, att.attname "
+            "FROM pg_index i "
+            "JOIN pg_class idx ON idx.oid = i.indexrelid "
+            "JOIN pg_class tbl ON tbl.oid = i.indrelid "
+            "JOIN pg_attribute att ON att.attrelid = i.indrelid "
+            "AND att.attnum = i.indkey[0]"
+        )
+    )
+
+    return {name: (table, column) for name, table, column in rows}
+
+
+def full_scans(plan, indexes):
+    """Yield the relation of every scan reading a whole table or index.
+
+    An index scan only seeks when its condition constrains the index's
+    leading column; otherwise, e.g. filtering a (bucket_id, movie_id) key
+    on movie_id alone, it walks every entry.
+    """
+
+    if plan["Node Type"] == "Seq Scan":
+        yield plan["Relation Name"]
+
+    if plan.get("Index Name") in indexes:
+        table, column = indexes[plan["Index Name"]]
+
+        if not re.search(rf"(?<![\w.]){column}\b", plan.get("Index Cond", "")):
+            yield table
+
+    for child in plan.get("Plans", []):
+        yield from full_scans(child, indexes)
+
+
+def explain(db, statement, parameters):
+    """JSON plan of a statement, without executing it.
+
+    Random reads are priced like the SSDs production runs on; with the
+    default cost the planner scans the seeded tables rather than probe an
+    index a few dozen times.
+    """
+
+    connection = db.session.connection()
+    connection.exec_driver_sql("SET LOCAL random_page_cost = 1.1")
+    result = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {statement}", parameters
+    ).scalar()
+
+    if isinstance(result, str):
+        result = json.loads(result)
+
+    return result[0]["Plan"]
+
+
+def test_routes_avoid_full_scans_of_large_tables():
+    from benchmarks import harness
+    from models import db
+    from seed import seed_dataset
+
+    app = harness.load_app()
+
+    with app.app_context():
+        ids = seed_dataset()
+        sizes = table_sizes(db)
+        indexes = index_columns(db)
+
+    headers = harness.auth_headers(app, ids["user_id"])
+    client = app.test_client()
+
+    failures = []
+
+    # in order, writes run last on rows reserved for them
+    for route in harness.build_routes(ids):
+        harness.clear_response_cache(app)
+
+        with harness.capture_statements() as statements:
+            harness.call(client, route, headers)
+
+        with app.app_context():
+            for statement, parameters, many in statements:
+                if many or not statement.lstrip().upper().startswith(EXPLAINABLE):
+                    continue
+
+                plan = explain(db, statement, parameters)
+
+                for relation in full_scans(plan, indexes):
+                    size = sizes.get(relation, 0)
+
+                    if (
+                        size > FULL_SCAN_ROW_LIMIT
+                        and plan["Plan Rows"] < size * FULL_SCAN_SHARE
+                    ):
+                        failures.append(
+                            f"{route.name}: full scan of {relation}\n{statement}"
+                        )
+
+            db.session.rollback()
+
+    assert not failures, "\n\n".join(failures)
@@ -0,0 +1,79 @@
+import pytest
+
+from movie_bucket import rate_limit
+from movie_bucket.rate_limit import TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable stand-in for time.monotonic"""
+
+    now = [1000.0]
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+
+    return now
+
+
+def test_allows_burst_then_waits(clock):
+    bucket = TokenBucket()
+
+    for _ in range(3):
+        assert bucket.acquire("client", rate=1, burst=3) == 0
+
+    assert bucket.acquire("client", rate=1, burst=3) == pytest.approx(1)
+
+
+def test_refills_at_rate(clock):
+    bucket = TokenBucket()
+
+    for _ in range(2):
+        bucket.acquire("client", rate=2, burst=2)
+
+    clock[0] += 0.25
+    assert bucket.acquire("client", rate=2, burst=2) == pytest.approx(0.25)
+
+    clock[0] += 0.25
+    assert bucket.acquire("client", rate=2, burst=2) == 0
+
+
+def test_refill_is_capped_at_burst(clock):
+    bucket = TokenBucket()
+    bucket.acquire("client", rate=1, burst=2)
+
+    clock[0] += 60
+
+    assert bucket.acquire("client", rate=1, burst=2) == 0
+    assert bucket.acquire("client", rate=1, burst=2) == 0
+    assert bucket.acquire("client", rate=1, burst=2) > 0
+
+
+def test_clients_are_limited_separately(clock):
+    bucket = TokenBucket()
+    bucket.acquire("first", rate=1, burst=1)
+
+    assert bucket.acquire("first", rate=1, burst=1) > 0
+    assert bucket.acquire("second", rate=1, burst=1) == 0
+
+
+def test_prunes_refilled_buckets(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, "MAX_TRACKED_KEYS", 2)
+    bucket = TokenBucket()
+
+    bucket.acquire("idle", rate=1, burst=2)
+    clock[0] += 5
+    bucket.acquire("active", rate=1, burst=2)
+    bucket.acquire("new", rate=1, burst=2)
+
+    assert set(bucket.buckets) == {"active", "new"}
+
+
+def test_keeps_buckets_still_refilling(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, "MAX_TRACKED_KEYS", 2)
+    bucket = TokenBucket()
+
+    bucket.acquire("recent", rate=1, burst=2)
+    clock[0] += 1
+    bucket.acquire("active", rate=1, burst=2)
+    bucket.acquire("new", rate=1, burst=2)
+
+    assert set(bucket.buckets) == {"recent", "active", "new"}